@@ -0,0 +1,187 @@
+# BISHistory.py
+# Locally persisted BIS policy rate history that is updated incrementally. For every series
+# (REF_AREA label) it records the last observation date (the watermark) and a checksum of the
+# observations up to it. A refresh only cleans and merges rows newer than the watermark;
+# a series is only rebuilt from scratch when its checksum shows BIS revised past observations.
+# This is the only stored copy of the policy rate table: it is also served when BIS cannot be
+# reached, in offline mode, and while another worker is refreshing it.
+
+import os
+import numpy as np
+import pandas as pd
+from FrameStore import save_frame, load_frame, frame_exists, cache_dir, read_json, write_json
+from CompactFrames import compact_frame
+from Metrics import timed
+
+HISTORY_DIR = cache_dir("DASHBOARD_BIS_HISTORY_DIR", "bis_history")
+HISTORY_BASE = os.path.join(HISTORY_DIR, "policy_rates")
+META_PATH = os.path.join(HISTORY_DIR, "policy_rates.json")
+
+# Bump when the columns or dtypes of the stored history change, so old files are rebuilt
+HISTORY_VERSION = 2
+
+
+def _read_meta():
+    meta = read_json(META_PATH)
+    if meta is None or meta.get("version") != HISTORY_VERSION or not frame_exists(HISTORY_BASE):
+        return None
+    return meta
+
+
+# Integer code of every row's series label, and the labels themselves
+# (the raw REF_AREA column is read as a categorical, so no per-row string conversion is needed)
+def _series_codes(raw):
+    labels = raw["Country"]
+    if not isinstance(labels.dtype, pd.CategoricalDtype):
+        labels = labels.astype("category")
+    return labels.cat.codes.to_numpy(), [str(label) for label in labels.cat.categories]
+
+
+# One hash per raw Date string / Interest Rate row
+def _row_hashes(raw):
+    return pd.util.hash_pandas_object(raw[["Date", "Interest Rate"]], index=False).to_numpy()
+
+
+# Per-series "sum of row hashes:row count" of the rows selected by mask (all rows when None)
+def _checksums(hashes, codes, labels, mask=None):
+    keep = codes >= 0 if mask is None else mask & (codes >= 0)
+    grouped = pd.Series(hashes[keep]).groupby(codes[keep])
+    sums = grouped.sum()
+    counts = grouped.size()
+    return {labels[code]: f"{int(sums[code])}:{int(counts[code])}" for code in sums.index}
+
+
+# Per-series checksum and row count of raw Country label / Date string / Interest Rate rows
+def series_checksums(raw):
+    codes, labels = _series_codes(raw)
+    return _checksums(_row_hashes(raw), codes, labels)
+
+
+# Last observation date (as the raw ISO string) of each series
+def series_watermarks(raw):
+    codes, labels = _series_codes(raw)
+    maxima = raw["Date"].groupby(codes).max()
+    return {labels[code]: str(date) for code, date in maxima.items() if code >= 0}
+
+
+def _save(history, fingerprint, watermarks, checksums):
+    save_frame(HISTORY_BASE, history)
+    write_json(META_PATH, {
+        "version": HISTORY_VERSION,
+        "fingerprint": fingerprint,
+        "watermarks": watermarks,
+        "checksums": checksums
+    })
+
+
+# Return the cleaned history if it was built from exactly this download, otherwise None
+def load_if_unchanged(fingerprint):
+    meta = _read_meta()
+    if meta is None or fingerprint is None or meta.get("fingerprint") != fingerprint:
+        return None
+    return load_frame(HISTORY_BASE)
+
+
+# Return the last stored history whatever download it was built from, None if there is none
+def stored_history(*args, **kwargs):
+    if _read_meta() is None:
+        return None
+    return load_frame(HISTORY_BASE)
+
+
+# Codes of two categorical columns against one sorted category list (-1 for values not in it)
+def _recode(a, b, categories=None):
+    a, b = a.astype("category"), b.astype("category")
+    if categories is None:
+        categories = sorted(set(a.cat.categories) | set(b.cat.categories))
+    positions = {value: i for i, value in enumerate(categories)}
+
+    def codes(column):
+        # The extra -1 at the end maps the -1 code of missing values to -1
+        lookup = np.array([positions.get(value, -1) for value in column.cat.categories] + [-1], dtype=np.int64)
+        return lookup[column.cat.codes.to_numpy()]
+    return categories, codes(a), codes(b)
+
+
+# Append each series' cleaned new rows after its block in the (sorted) history, replacing the
+# history rows of the series named in dropped. Both frames are sorted by Country then Date and the
+# new rows of a series are later than its history rows, so the result is assembled with one copy
+# per column and no sort.
+def append_series(history, new, dropped=()):
+    countries, history_codes, new_codes = _recode(history["Country"], new["Country"])
+    dropped = set(dropped)
+
+    # Row order: each series' history block followed by its new rows (new rows offset past the history)
+    series = np.arange(len(countries))
+    history_starts = np.searchsorted(history_codes, series, side="left")
+    history_ends = np.searchsorted(history_codes, series, side="right")
+    new_starts = np.searchsorted(new_codes, series, side="left") + len(history)
+    new_ends = np.searchsorted(new_codes, series, side="right") + len(history)
+    blocks = []
+    for i in series:
+        if countries[i] not in dropped:
+            blocks.append(np.arange(history_starts[i], history_ends[i]))
+        blocks.append(np.arange(new_starts[i], new_ends[i]))
+    order = np.concatenate(blocks or [np.array([], dtype=np.int64)]).astype(np.int64)
+
+    merged = {}
+    for column in history.columns:
+        if isinstance(history[column].dtype, pd.CategoricalDtype):
+            categories, a, b = _recode(history[column], new[column], countries if column == "Country" else None)
+            codes = np.concatenate([a, b])[order]
+            merged[column] = pd.Categorical.from_codes(codes, categories=categories)
+        else:
+            merged[column] = np.concatenate([history[column].to_numpy(), new[column].to_numpy()])[order]
+    history = pd.DataFrame(merged)
+    # Dropped series can leave unused labels in the other categorical columns (e.g. their Code)
+    if len(dropped):
+        history = compact_frame(history, categories=[c for c in history.columns
+                                                     if isinstance(history[c].dtype, pd.CategoricalDtype)])
+    return history
+
+
+# Merge a freshly parsed BIS file (raw columns from read_policy_rates_zip) into the stored history.
+# clean is the function turning raw rows into canonical rows (IRDataLoad.clean_policy_rates).
+def update_history(raw, clean, fingerprint=None):
+    meta = _read_meta()
+    codes, labels = _series_codes(raw)
+    hashes = _row_hashes(raw)
+    checksums = _checksums(hashes, codes, labels)
+
+    # No usable history yet: clean everything once
+    if meta is None:
+        history = clean(raw.copy())
+        _save(history, fingerprint, series_watermarks(raw), checksums)
+        return history
+
+    with timed("bis", "history_diff"):
+        # Rows after their series' watermark are new (a series not seen before is all new).
+        # The extra "" at the end is the watermark of rows with no label (code -1).
+        watermarks = np.array([meta["watermarks"].get(label, "") for label in labels] + [""], dtype=object)
+        is_new = raw["Date"].to_numpy(dtype=object, na_value="") > watermarks[codes]
+
+        # Series whose observations up to the watermark no longer match were revised by BIS
+        old_checksums = _checksums(hashes, codes, labels, ~is_new)
+        revised = {label for label, checksum in old_checksums.items()
+                   if meta["checksums"].get(label) != checksum}
+        # Series that lost rows or disappeared from the file also count as revised
+        revised |= {label for label in meta["checksums"] if label not in old_checksums}
+        is_revised = np.isin(codes, [code for code, label in enumerate(labels) if label in revised])
+
+    history = load_frame(HISTORY_BASE)
+    ingest = raw[is_new | is_revised]
+
+    if len(ingest) or revised:
+        with timed("bis", "history_merge"):
+            # Display names as produced by IRDataLoad.clean_policy_rates ("GB: United Kingdom" -> "United Kingdom")
+            revised_names = pd.Series(sorted(revised), dtype=object).str.replace(r'^[A-Z]{2}:\s*', '', regex=True)
+            # Revised series are dropped from the history and come back whole with the new rows
+            history = append_series(history, clean(ingest.copy()), dropped=list(revised_names))
+
+    # Watermarks of unchanged series carry over, new and rebuilt series take theirs from the ingested rows
+    present = set(labels)
+    watermarks = {label: date for label, date in meta["watermarks"].items()
+                  if label in present and label not in revised}
+    watermarks.update(series_watermarks(ingest))
+    _save(history, fingerprint, watermarks, checksums)
+    return history
@@ -0,0 +1,45 @@
+# CompactFrames.py
+# Compact in-memory representation of the loaded tables. Repeated labels (country names, codes,
+# series IDs) are stored as categoricals, so each row holds a small integer code instead of a
+# Python string, and values that only carry a few significant digits are stored as float32.
+# expanded_bytes reports what the same table would take as object strings and float64,
+# which is how the metrics show the before/after footprint of each dataset.
+
+import numpy as np
+import pandas as pd
+
+
+# Convert the label columns to categoricals (dropping unused categories) and the value columns to float32
+def compact_frame(df, categories=(), float32=()):
+    df = df.copy()
+    for column in categories:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            df[column] = values.cat.remove_unused_categories()
+        else:
+            df[column] = values.astype("category")
+    for column in float32:
+        df[column] = df[column].astype(np.float32)
+    return df
+
+
+# Bytes of one column (or array) if it were stored the wide way: object strings and float64
+def _expanded_column_bytes(values):
+    if isinstance(values, pd.Series):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return int(values.astype(object).memory_usage(deep=True, index=False))
+        if values.dtype == np.float32:
+            return len(values) * 8
+        return int(values.memory_usage(deep=True, index=False))
+    if getattr(values, "dtype", None) == np.float32:
+        return values.size * 8
+    return getattr(values, "nbytes", 0)
+
+
+# Footprint of a loaded dataset (a dataframe, or a dict of per-country arrays) without compaction
+def expanded_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.index.memory_usage(deep=True)) + sum(_expanded_column_bytes(value[c]) for c in value.columns)
+    if isinstance(value, dict):
+        return sum(_expanded_column_bytes(a) for arrays in value.values() for a in arrays)
+    return 0
@@ -0,0 +1,183 @@
+# DataFetch.py
+# Shared HTTP layer for the data loaders: one pooled session, default timeouts and an
+# on-disk response cache that revalidates with ETag / Last-Modified (conditional GET).
+
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from FrameStore import cache_dir, temp_path, read_json, write_json
+from Metrics import timed
+
+# Folder for cached responses, can be overridden with the DASHBOARD_CACHE_DIR environment variable
+CACHE_DIR = cache_dir("DASHBOARD_CACHE_DIR", "http")
+
+# Default (connect, read) timeout in seconds for every request
+DEFAULT_TIMEOUT = (10, 120)
+
+# Responses checked with the server less than this many seconds ago are used without revalidating
+# (lets a fingerprint check and the loader that follows it share one request)
+FRESH_SECONDS = float(os.environ.get("DASHBOARD_HTTP_FRESH_SECONDS", "60"))
+
+# Default headers sent with every request (ONS rejects requests without a browser-like User-Agent)
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "hits": 0,           # served from cache after a 304 Not Modified
+    "fresh": 0,          # served from cache without a request (checked within FRESH_SECONDS)
+    "misses": 0,         # full download (no cache entry or content changed)
+    "bytes_saved": 0,    # body bytes not downloaded thanks to 304 responses
+    "bytes_downloaded": 0
+}
+
+
+# Result of a fetch, with the same accessors the loaders used on requests.Response
+class FetchResult:
+    def __init__(self, url, path, status_code, from_cache, etag=None, last_modified=None):
+        self.url = url
+        self.path = path                  # cached body on disk, can be opened directly (e.g. ZIP files)
+        self.status_code = status_code
+        self.from_cache = from_cache
+        self.etag = etag
+        self.last_modified = last_modified
+
+    # Identifies the content: the server's validator, or a hash of the body when there is none
+    def fingerprint(self):
+        if self.etag or self.last_modified:
+            return f"{self.etag or ''}|{self.last_modified or ''}"
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @property
+    def content(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+# Create (once) and return the pooled session shared by all loaders
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+
+# Route requests for a URL prefix through another transport adapter (e.g. local fixtures for benchmarks)
+def mount_transport(prefix, adapter):
+    get_session().mount(prefix, adapter)
+
+
+# Build the cache key from the URL and the (sorted) query parameters
+def cache_key(url, params=None):
+    items = sorted((params or {}).items())
+    raw = url + "?" + "&".join(f"{k}={v}" for k, v in items)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _cache_paths(key):
+    return os.path.join(CACHE_DIR, key + ".body"), os.path.join(CACHE_DIR, key + ".json")
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+# Stream a response body to a temporary file, then move it into place so readers never see half a file
+def _download(response, body_path):
+    tmp_path = temp_path(body_path)
+    size = 0
+    with open(tmp_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            f.write(chunk)
+            size += len(chunk)
+    os.replace(tmp_path, body_path)
+    return size
+
+
+# GET a URL through the cache. Unchanged resources cost a 304 instead of a full download.
+def fetch(url, params=None, headers=None, timeout=DEFAULT_TIMEOUT, source=None, max_age=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    key = cache_key(url, params)
+    body_path, meta_path = _cache_paths(key)
+    max_age = FRESH_SECONDS if max_age is None else max_age
+
+    # Add validators from the cached copy so the server can answer 304 Not Modified
+    request_headers = dict(headers or {})
+    meta = read_json(meta_path) if os.path.exists(body_path) else None
+    if meta and time.time() - meta.get("checked_at", 0) < max_age:
+        _count("fresh")
+        return FetchResult(url, body_path, 200, True, meta.get("etag"), meta.get("last_modified"))
+    if meta:
+        if meta.get("etag"):
+            request_headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            request_headers["If-Modified-Since"] = meta["last_modified"]
+
+    # Network time (request and body download) is recorded per source
+    with timed(source or urlparse(url).netloc, "network"):
+        response = get_session().get(url, params=params, headers=request_headers, timeout=timeout, stream=True)
+        if response.status_code == 304 and meta:
+            response.close()
+        else:
+            response.raise_for_status()
+            size = _download(response, body_path)
+
+    # Not modified: serve the cached body
+    if response.status_code == 304 and meta:
+        meta["checked_at"] = time.time()
+        write_json(meta_path, meta)
+        _count("hits")
+        _count("bytes_saved", os.path.getsize(body_path))
+        return FetchResult(url, body_path, 200, True, meta.get("etag"), meta.get("last_modified"))
+
+    meta = {
+        "url": response.url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "checked_at": time.time()
+    }
+    write_json(meta_path, meta)
+
+    _count("misses")
+    _count("bytes_downloaded", size)
+    return FetchResult(url, body_path, response.status_code, False, meta["etag"], meta["last_modified"])
+
+
+# Remove every cached response (used by benchmarks to measure cold fetches)
+def clear_cache():
+    if os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+# Return a copy of the cache counters
+def cache_stats():
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total else 0.0
+    return stats
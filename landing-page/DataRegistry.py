@@ -0,0 +1,207 @@
+# DataRegistry.py
+# Lazy dataset registry: pages register how to load their data, and the data is only fetched
+# on first use (or by a background warmup thread) instead of at import time.
+# Datasets with a TTL are refreshed in the background; callbacks keep serving the previous
+# value until the new one is swapped in, and a failed refresh keeps the previous value.
+# Datasets registered with snapshot=True can be shared between worker processes (see Snapshots.py).
+
+import logging
+import threading
+import time
+import Snapshots
+
+logger = logging.getLogger(__name__)
+
+# Refresh intervals (seconds) per upstream source
+DAY = 24 * 60 * 60
+TTL_BIS = DAY               # BIS policy rates, published daily
+TTL_ONS = 30 * DAY          # ONS labour market releases, monthly
+TTL_WORLD_BANK = 365 * DAY  # World Bank GDP, annual
+
+# How long to wait before retrying a refresh that failed
+RETRY_AFTER = 15 * 60
+
+# How often the scheduler checks for expired datasets
+SCHEDULER_INTERVAL = 60
+
+
+# A registered dataset and its currently loaded value
+class Dataset:
+    def __init__(self, name, loader, ttl=None, depends_on=(), snapshot=False, source=None):
+        self.name = name
+        self.loader = loader
+        self.source = source               # upstream source (e.g. "bis"), for per-source limits at startup
+        self.snapshot = snapshot           # share through Arrow snapshots when snapshot mode is on
+        self.snapshot_version = None
+        self.ttl = ttl                     # seconds before a background refresh, None to never expire
+        self.depends_on = tuple(depends_on)  # datasets this one is derived from
+        self.value = None
+        self.version = 0          # increases every time a new value is loaded
+        self.loaded_at = None
+        self.load_seconds = None
+        self.error = None         # last load error, if any
+        self.last_attempt = None
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.version > 0
+
+
+_datasets = {}
+_warmup_thread = None
+_scheduler_thread = None
+
+
+# Register a dataset under a name with a zero-argument loader function.
+# Derived datasets list the datasets they are built from in depends_on and are rebuilt when those refresh.
+# Base datasets fetched from upstream sources set snapshot=True so workers can share them,
+# and name their source so startup loading can limit the requests made to each host.
+def register_dataset(name, loader, ttl=None, depends_on=(), snapshot=False, source=None):
+    if name not in _datasets:
+        _datasets[name] = Dataset(name, loader, ttl, depends_on, snapshot, source)
+    else:
+        dataset = _datasets[name]
+        dataset.loader = loader
+        dataset.ttl = ttl
+        dataset.depends_on = tuple(depends_on)
+        dataset.snapshot = snapshot
+        dataset.source = source
+    return _datasets[name]
+
+
+def registered_datasets():
+    return list(_datasets)
+
+
+# Return a dataset, loading it on first use. Concurrent callers wait for the same load.
+def get_dataset(name):
+    dataset = _datasets[name]
+    if dataset.ready:
+        return dataset.value
+    with dataset.lock:
+        # Another thread may have finished loading while we waited for the lock
+        if not dataset.ready:
+            _load(dataset)
+    return dataset.value
+
+
+def _load(dataset):
+    start = time.perf_counter()
+    dataset.last_attempt = time.time()
+    try:
+        value = _run_loader(dataset)
+    except Exception as exc:
+        dataset.error = exc
+        raise
+    # Swap in the new value in one assignment so readers see either the old or the new frame
+    dataset.value = value
+    dataset.error = None
+    dataset.load_seconds = time.perf_counter() - start
+    dataset.loaded_at = time.time()
+    dataset.version += 1
+    logger.info("Loaded dataset %s in %.2fs", dataset.name, dataset.load_seconds)
+
+
+# Call a dataset's loader, or read/write its shared snapshot when snapshot mode is on
+def _run_loader(dataset):
+    if not dataset.snapshot or Snapshots.SNAPSHOT_MODE == "off":
+        return dataset.loader()
+
+    if Snapshots.SNAPSHOT_MODE == "consume":
+        wait = Snapshots.FIRST_SNAPSHOT_WAIT if dataset.snapshot_version is None else 0
+        version, value = Snapshots.wait_for_snapshot(dataset.name, timeout=wait)
+        if version is not None:
+            dataset.snapshot_version = version
+            return value
+        # No producer running: load the data in this worker rather than leave the tab empty
+        logger.warning("No snapshot for dataset %s, loading it directly", dataset.name)
+        return dataset.loader()
+
+    # Producer: load from the source and publish the result for the workers
+    value = dataset.loader()
+    dataset.snapshot_version = Snapshots.write_snapshot(dataset.name, value)
+    return value
+
+
+# Reload a dataset in the current thread while callers keep using the previous value,
+# then rebuild the datasets derived from it. Returns False if the refresh failed.
+def refresh_dataset(name):
+    dataset = _datasets[name]
+    with dataset.lock:
+        if dataset.refreshing:
+            return True
+        dataset.refreshing = True
+    try:
+        _load(dataset)
+    except Exception:
+        logger.exception("Refresh failed for dataset %s, keeping the previous version", name)
+        return False
+    finally:
+        dataset.refreshing = False
+
+    for dependent in _datasets.values():
+        if name in dependent.depends_on and dependent.ready:
+            refresh_dataset(dependent.name)
+    return True
+
+
+# True when a loaded dataset is older than its TTL (or a failed refresh is due for a retry).
+# Snapshot consumers instead check whether the producer has published a newer snapshot.
+def dataset_expired(name, now=None):
+    dataset = _datasets[name]
+    if not dataset.ready or dataset.refreshing:
+        return False
+    if dataset.snapshot and Snapshots.SNAPSHOT_MODE == "consume":
+        version = Snapshots.current_snapshot_version(name)
+        return version is not None and version != dataset.snapshot_version
+    if dataset.ttl is None:
+        return False
+    now = now or time.time()
+    if dataset.error is not None:
+        return now - dataset.last_attempt >= min(RETRY_AFTER, dataset.ttl)
+    return now - dataset.loaded_at >= dataset.ttl
+
+
+def dataset_ready(name):
+    return _datasets[name].ready
+
+
+def dataset_version(name):
+    return _datasets[name].version
+
+
+# Load every registered dataset (or the given names) in a background thread.
+# The sources are fetched concurrently, see StartupLoader.py.
+def start_warmup(names=None):
+    global _warmup_thread
+    if _warmup_thread is not None and _warmup_thread.is_alive():
+        return _warmup_thread
+
+    def warmup():
+        import StartupLoader
+        # Failures are logged in the startup report, the tab will retry on first use
+        StartupLoader.load_all(names)
+
+    _warmup_thread = threading.Thread(target=warmup, name="dataset-warmup", daemon=True)
+    _warmup_thread.start()
+    return _warmup_thread
+
+
+# Start a background thread that refreshes expired datasets (stale-while-revalidate)
+def start_refresh_scheduler(interval=SCHEDULER_INTERVAL):
+    global _scheduler_thread
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return _scheduler_thread
+
+    def run():
+        while True:
+            time.sleep(interval)
+            for name in registered_datasets():
+                if dataset_expired(name):
+                    refresh_dataset(name)
+
+    _scheduler_thread = threading.Thread(target=run, name="dataset-refresh", daemon=True)
+    _scheduler_thread.start()
+    return _scheduler_thread
@@ -0,0 +1,68 @@
+# Downsample.py
+# Server-side point reduction for long line charts. Policy rates are step functions, so the
+# points either side of every change are kept first (this keeps the exact shape), and only if
+# a trace is still too long is it reduced further with Largest-Triangle-Three-Buckets (LTTB).
+
+import numpy as np
+
+# Most points sent to the browser per trace
+MAX_POINTS_PER_TRACE = 1500
+
+
+# Indices of the first and last point plus the points either side of every change in y
+def step_points(y):
+    n = len(y)
+    if n <= 2:
+        return np.arange(n)
+    changes = np.flatnonzero(y[1:] != y[:-1]) + 1
+    keep = np.concatenate(([0], changes - 1, changes, [n - 1]))
+    return np.unique(keep)
+
+
+# Largest-Triangle-Three-Buckets: indices of `threshold` points that best keep the visual shape
+def lttb(x, y, threshold):
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Work on float x values (dates as nanoseconds)
+    x = x.astype('int64').astype('float64') if x.dtype.kind == 'M' else x.astype('float64')
+    y = y.astype('float64')
+
+    # Bucket edges for the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # Pick the point in this bucket making the largest triangle with the previous pick and the average
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+# Reduce a trace to at most max_points, keeping every step change where possible
+def downsample(x, y, max_points=MAX_POINTS_PER_TRACE):
+    if len(x) <= max_points:
+        return x, y
+    keep = step_points(y)
+    x, y = x[keep], y[keep]
+    if len(x) > max_points:
+        keep = lttb(x, y, max_points)
+        x, y = x[keep], y[keep]
+    return x, y
+
+
+# Slice a sorted trace to [start, end], keeping one point either side so lines run to the edges
+def window(x, y, start=None, end=None):
+    lo = 0 if start is None else max(int(np.searchsorted(x, start, side='left')) - 1, 0)
+    hi = len(x) if end is None else min(int(np.searchsorted(x, end, side='right')) + 1, len(x))
+    return x[lo:hi], y[lo:hi]
@@ -1,18 +1,21 @@
 from dash import html, dcc
 import pandas as pd
-import plotly.express as px
 from EmpRatesLoad import get_latest_unemployment, get_latest_awe  
+from DataRegistry import register_dataset, get_dataset, dataset_version, TTL_ONS
+from LineCharts import build_country_index, line_figure
+from FigureCache import figure_cache
+from Metrics import timed
 
 # -------------------------------
-# Load data
+# Register data (fetched on first use, refreshed monthly)
 # -------------------------------
-df_latest = get_latest_unemployment()
-df_awe = get_latest_awe()
+register_dataset('unemployment', get_latest_unemployment, ttl=TTL_ONS, snapshot=True, source='ons')
+register_dataset('awe', get_latest_awe, ttl=TTL_ONS, snapshot=True, source='ons')
+register_dataset('awe_index', lambda: build_country_index(get_dataset('awe'), 'Date', 'Average Weekly Earnings'),
+                 depends_on=['awe'])  # Date/earnings arrays the AWE line graph is built from
 
-latest_row = df_latest.sort_values('Date').iloc[-1]
-rate = latest_row['Unemployment Rate']
-date = latest_row['Date']
-country = latest_row['Country']
+# Datasets the tab layout is built from (it is rebuilt when one of them changes)
+LAYOUT_DATASETS = ['unemployment', 'awe_index']
 
 # -------------------------------
 # KPI circle component
@@ -47,93 +50,113 @@ def unemployment_kpi_circle(country, rate, date):
     ])
 
 # -------------------------------
-# Line graph for AWE
+# Build the tab from the loaded data (called when the tab is opened)
 # -------------------------------
-fig_awe = px.line(df_awe, x='Date', y='Average Weekly Earnings')
-fig_awe.update_layout(
-    margin=dict(l=0, r=0, t=30, b=0),
-    height=350,
-    xaxis_title='',
-    yaxis_title='Earnings (£)',
-    font=dict(size=12)
-)
+def unemployment_kpi_component():
+    df_latest = get_dataset('unemployment')
 
-line_graph_component = dcc.Graph(
-    figure=fig_awe,
-    style={'width': '100%', 'height': '350px'}
-)
+    latest_row = df_latest.sort_values('Date').iloc[-1]
+    rate = latest_row['Unemployment Rate']
+    date = latest_row['Date']
+    country = latest_row['Country']
 
-# -------------------------------
-# Header row: left and right titles
-# -------------------------------
-header_row = html.Div(style={
-    'display': 'flex',
-    'flexDirection': 'row',
-    'justifyContent': 'space-between',
-    'alignItems': 'flex-start',
-    'width': '100%'
-}, children=[
-    # Left title
-    html.H3(f"Seasonally Adjusted Unemployment Rate {date.strftime('%d %B %Y')}", style={
-        'color': '#666',
-        'textAlign': 'left',
-        'margin': '0'
-    }),
-    
-    # Right title
-    html.H3("Average Weekly Earnings Over Time", style={
-        'color': '#003366',
-        'textAlign': 'right',
-        'margin': '0'
-    })
-])
+    # -------------------------------
+    # Line graph for AWE
+    # -------------------------------
+    # Built from the same typed-array figure path as the other line charts, once per data version
+    def build_awe_figure():
+        index = get_dataset('awe_index')
+        with timed('awe', 'figure_build'):
+            fig = line_figure(index, sorted(index), title='', x_title='Date', y_title='Average Weekly Earnings')
+        fig['layout'].update({
+            'margin': {'l': 0, 'r': 0, 't': 30, 'b': 0},
+            'height': 350,
+            'showlegend': False,
+            'font': {'size': 12}
+        })
+        fig['layout']['xaxis']['title'] = {'text': ''}
+        fig['layout']['yaxis']['title'] = {'text': 'Earnings (£)'}
+        return fig
 
-# -------------------------------
-# Content row: left KPI, right graph
-# -------------------------------
-content_row = html.Div(style={
-    'display': 'flex',
-    'flexDirection': 'row',
-    'justifyContent': 'space-between',
-    'alignItems': 'flex-start',
-    'marginTop': '10px',
-    'width': '100%'
-}, children=[
-    # LEFT COLUMN: KPI circle + explanatory text
-    html.Div(style={'flex': '0 0 300px'}, children=[
-        unemployment_kpi_circle(country, rate, date),
-        html.Div(
-            "This is the current seasonally adjusted unemployment rate for those aged 16 and over in the United Kingdom",
-            style={
-                'marginTop': '20px',
-                'fontSize': '14px',
-                'color': '#333',
-                'textAlign': 'left',
-                'maxWidth': '300px'
-            }
-        )
-    ]),
+    key = figure_cache.make_key('awe', dataset_version('awe_index'), ['United Kingdom'])
+    fig_awe = figure_cache.get_or_build(key, build_awe_figure)
+
+    line_graph_component = dcc.Graph(
+        figure=fig_awe,
+        style={'width': '100%', 'height': '350px'}
+    )
 
-    # RIGHT COLUMN: line graph aligned with right-hand title
-    html.Div(style={'flex': '0 0 600px', 'textAlign': 'left'}, children=[
-        line_graph_component
+    # -------------------------------
+    # Header row: left and right titles
+    # -------------------------------
+    header_row = html.Div(style={
+        'display': 'flex',
+        'flexDirection': 'row',
+        'justifyContent': 'space-between',
+        'alignItems': 'flex-start',
+        'width': '100%'
+    }, children=[
+        # Left title
+        html.H3(f"Seasonally Adjusted Unemployment Rate {date.strftime('%d %B %Y')}", style={
+            'color': '#666',
+            'textAlign': 'left',
+            'margin': '0'
+        }),
+
+        # Right title
+        html.H3("Average Weekly Earnings Over Time", style={
+            'color': '#003366',
+            'textAlign': 'right',
+            'margin': '0'
+        })
     ])
-])
 
-# -------------------------------
-# Full layout
-# -------------------------------
-unemployment_kpi_component = html.Div(style={
-    'padding': '20px',
-    'fontFamily': 'Arial',
-    'width': '100%'
-}, children=[
-    html.H1("Let's explore UK Wages & Employment rates", style={
-        'color': '#003366',
-        'fontSize': '24px',
-        'textAlign': 'left',
-        'marginBottom': '10px'
-    }),
-    header_row,
-    content_row
-])
+    # -------------------------------
+    # Content row: left KPI, right graph
+    # -------------------------------
+    content_row = html.Div(style={
+        'display': 'flex',
+        'flexDirection': 'row',
+        'justifyContent': 'space-between',
+        'alignItems': 'flex-start',
+        'marginTop': '10px',
+        'width': '100%'
+    }, children=[
+        # LEFT COLUMN: KPI circle + explanatory text
+        html.Div(style={'flex': '0 0 300px'}, children=[
+            unemployment_kpi_circle(country, rate, date),
+            html.Div(
+                "This is the current seasonally adjusted unemployment rate for those aged 16 and over in the United Kingdom",
+                style={
+                    'marginTop': '20px',
+                    'fontSize': '14px',
+                    'color': '#333',
+                    'textAlign': 'left',
+                    'maxWidth': '300px'
+                }
+            )
+        ]),
+
+        # RIGHT COLUMN: line graph aligned with right-hand title
+        html.Div(style={'flex': '0 0 600px', 'textAlign': 'left'}, children=[
+            line_graph_component
+        ])
+    ])
+
+    # -------------------------------
+    # Full layout
+    # -------------------------------
+    return html.Div(style={
+        'padding': '20px',
+        'fontFamily': 'Arial',
+        'width': '100%'
+    }, children=[
+        html.H1("Let's explore UK Wages & Employment rates", style={
+            'color': '#003366',
+            'fontSize': '24px',
+            'textAlign': 'left',
+            'marginBottom': '10px'
+        }),
+        header_row,
+        content_row
+    ])
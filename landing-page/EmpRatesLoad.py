@@ -1,50 +1,113 @@
 # EmpRatesDataLoad.py
 
 import pandas as pd
-import requests
+from DataFetch import fetch
+from Metrics import timed
+from ONSPeriods import parse_ons_periods, MONTHLY
+from WarmStart import warm_start, stored_output
+from SingleFlight import single_flight
+from CompactFrames import compact_frame
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 
-def get_latest_unemployment():
-    url = "https://www.ons.gov.uk/generator?format=csv&uri=/employmentandlabourmarket/peoplenotinwork/unemployment/timeseries/mgsx/lms"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
+# ONS generator endpoint, the series is chosen with the uri parameter
+ONS_GENERATOR_URL = "https://www.ons.gov.uk/generator"
 
-    # Load CSV, skipping metadata rows
-    data = StringIO(response.text)
-    df = pd.read_csv(data, skiprows=8)
+# ONS series (CDID) -> timeseries uri (topic path / series / dataset)
+ONS_SERIES = {
+    "MGSX": "/employmentandlabourmarket/peoplenotinwork/unemployment/timeseries/mgsx/lms",  # Unemployment rate (16+, SA)
+    "L55O": "/economy/inflationandpriceindices/timeseries/l55o/mm23",  # CPIH annual rate
+    "AP2Y": "/employmentandlabourmarket/peopleinwork/employmentandemployeetypes/timeseries/ap2y/lms",  # Vacancies
+    "BCJD": "/employmentandlabourmarket/peoplenotinwork/outofworkbenefits/timeseries/bcjd/lms",  # Claimant count
+}
 
-    # Rename columns
-    df.columns = ['Date', 'Unemployment Rate']
+# Most ONS requests made at the same time
+MAX_CONCURRENT_REQUESTS = 4
+
+# Bump when the columns of the loaders' output change
+ONS_SCHEMA = 2
+
+AWE_URL = "https://www.ons.gov.uk/generator?uri=/employmentandlabourmarket/peopleinwork/employmentandemployeetypes/bulletins/averageweeklyearningsingreatbritain/june2025/c7cd254e&format=csv"
+
+
+# Turn a series ID (e.g. "MGSX") or a full timeseries uri into the generator uri
+def ons_series_uri(series):
+    if series.startswith("/"):
+        return series
+    if series.upper() not in ONS_SERIES:
+        raise ValueError(f"Unknown ONS series {series!r}, pass its full timeseries uri instead")
+    return ONS_SERIES[series.upper()]
+
+
+# Shared pipeline: parse one generator CSV into Date / Value rows of the requested frequency
+def parse_ons_timeseries(text, series, frequency=MONTHLY):
+    # Metadata rows (Title, CDID, ...) are kept here and dropped below because they are not periods
+    with timed("ons", "csv_parse"):
+        df = pd.read_csv(StringIO(text), header=None, usecols=[0, 1], names=["Period", "Value"],
+                         dtype=str, on_bad_lines="skip")
+
+    with timed("ons", "date_parse"):
+        periods = parse_ons_periods(df["Period"])
+    keep = (periods["Frequency"] == frequency).fillna(False).to_numpy()
+
+    return pd.DataFrame({
+        "Date": periods["Date"][keep].to_numpy(),
+        "Value": pd.to_numeric(df["Value"][keep], errors="coerce").to_numpy(),
+        "Series": series
+    }).dropna(subset=["Date", "Value"])
 
-    # Drop empty rows
-    df = df.dropna(subset=['Date', 'Unemployment Rate'])
 
-    # Parse date robustly
-    df['Date'] = pd.to_datetime(df['Date'], format='mixed', dayfirst=True, errors='coerce')
+# Generator URL and parameters of one series
+def ons_request(series):
+    return ONS_GENERATOR_URL, {"format": "csv", "uri": ons_series_uri(series)}
 
-    # Drop rows where date parsing failed
-    df = df.dropna(subset=['Date'])
+
+# Fetch several ONS timeseries concurrently (over the shared pooled session) and return one
+# long-format frame with Date, Value and Series columns
+@single_flight("ons_timeseries", stale=stored_output("ons_timeseries", ONS_SCHEMA))
+@warm_start("ons_timeseries", ONS_SCHEMA, lambda series_ids, *args, **kwargs: [ons_request(s) for s in series_ids])
+def get_ons_timeseries(series_ids, frequency=MONTHLY, max_workers=MAX_CONCURRENT_REQUESTS):
+    def load(series):
+        url, params = ons_request(series)
+        response = fetch(url, params=params, source="ons")
+        return parse_ons_timeseries(response.text, series, frequency)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(series_ids)))) as pool:
+        frames = list(pool.map(load, series_ids))
+
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["Date", "Value", "Series"])
+    df = df.sort_values(["Series", "Date"], kind="stable").reset_index(drop=True)
+    # ONS publishes these series to one or two decimal places, float32 keeps them exactly enough
+    return compact_frame(df, categories=["Series"], float32=["Value"])
+
+
+# frequency: "M" (monthly), "Q" (quarterly) or "A" (annual) rows of the series
+def get_latest_unemployment(frequency=MONTHLY):
+    df = get_ons_timeseries(["MGSX"], frequency=frequency)
+
+    # Rename columns
+    df = df.rename(columns={"Value": "Unemployment Rate"})[["Date", "Unemployment Rate"]]
 
     # Add static country
-    df['Country'] = 'United Kingdom'
+    df['Country'] = pd.Categorical(['United Kingdom'] * len(df))
 
     return df
 
+@single_flight("awe", stale=stored_output("awe", ONS_SCHEMA))
+@warm_start("awe", ONS_SCHEMA, lambda *args, **kwargs: [(AWE_URL, None)])
 def get_latest_awe():
-    url = "https://www.ons.gov.uk/generator?uri=/employmentandlabourmarket/peopleinwork/employmentandemployeetypes/bulletins/averageweeklyearningsingreatbritain/june2025/c7cd254e&format=csv"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    data = StringIO(response.text)
-    df = pd.read_csv(data, skiprows=8)
+    response = fetch(AWE_URL, source="ons")
+    with timed("ons", "csv_parse"):
+        data = StringIO(response.text)
+        df = pd.read_csv(data, skiprows=8)
     
     # Keep only first 2 columns (Month-Year, Value)
     df = df.iloc[:, [0, 1]]
     df.columns = ['Date', 'Average Weekly Earnings']
     
     # Convert 'Feb 2000' style text to datetime
-    df['Date'] = pd.to_datetime(df['Date'], format='%b %Y', errors='coerce')
+    with timed("ons", "date_parse"):
+        df['Date'] = parse_ons_periods(df['Date'])['Date']
     
     # Drop rows where parsing failed
     df = df.dropna(subset=['Date', 'Average Weekly Earnings'])
@@ -54,7 +117,7 @@ def get_latest_awe():
     df = df.dropna(subset=['Average Weekly Earnings'])
     
     df['Country'] = 'United Kingdom'
-    return df
+    return compact_frame(df, categories=['Country'], float32=['Average Weekly Earnings'])
 
 
 # Test
@@ -0,0 +1,111 @@
+# FigureCache.py
+# Memory-bounded LRU cache of built Plotly figures (plain dicts), keyed by chart, dataset version
+# and the normalized selection, so repeated selections skip pandas and figure building entirely:
+# a hit returns the stored dict as it is, with nothing to decode. Each figure is serialized once
+# when it is stored (with orjson when it is installed) to measure it: the JSON size is what the
+# memory budget is counted in, and the json_serialize stage and figure bytes histogram report the
+# cost and payload size of every figure built. Cached figures are shared, callers must not modify them.
+
+import json
+import threading
+from collections import OrderedDict
+from plotly.utils import PlotlyJSONEncoder
+from Metrics import timed, FIGURE_BYTES
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Default memory budget for cached figures
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class FigureCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()   # key -> (figure, serialized size in bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Build a cache key, the selection is sorted so the same countries in any order share an entry.
+    # extra holds anything else the figure depends on (e.g. the zoomed window).
+    @staticmethod
+    def make_key(chart, version, selection, extra=None):
+        return (chart, version, tuple(sorted(selection)), extra)
+
+    # Serialize a figure to utf-8 JSON bytes
+    @staticmethod
+    def dumps(figure):
+        if HAS_ORJSON:
+            try:
+                return orjson.dumps(figure, option=orjson.OPT_SERIALIZE_NUMPY)
+            except TypeError:
+                pass   # e.g. pandas objects, which only the Plotly encoder understands
+        return json.dumps(figure, cls=PlotlyJSONEncoder).encode('utf-8')
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    # Store a figure, returning its serialized size
+    def put(self, key, figure):
+        chart = key[0]
+        with timed(chart, 'json_serialize'):
+            size = len(self.dumps(figure))
+        FIGURE_BYTES.observe(size, chart=chart)
+        # Figures larger than the whole budget are not cached
+        if size > self.max_bytes:
+            return size
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (figure, size)
+            self._bytes += size
+            # Evict least recently used figures until we are back within budget
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+        return size
+
+    # Return the cached figure for a key, building and caching it on a miss
+    def get_or_build(self, key, build):
+        figure = self.get(key)
+        if figure is not None:
+            return figure
+        figure = build()
+        self.put(key, figure)
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+# Cache shared by the dashboard's chart callbacks
+figure_cache = FigureCache()
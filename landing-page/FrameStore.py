@@ -0,0 +1,85 @@
+# FrameStore.py
+# Local disk storage shared by the caches: dataframes (Feather when pyarrow is installed, pickle
+# otherwise), small JSON metadata files and the cache folder layout. Files are written to a
+# temporary name and moved into place, so readers never see half a file.
+
+import hashlib
+import json
+import os
+import threading
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+EXTENSION = ".feather" if HAS_PYARROW else ".pkl"
+
+# Every cache folder lives under here unless its environment variable points somewhere else
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "uk-growth-dashboard")
+
+
+# Cache folder for one kind of data, e.g. cache_dir("DASHBOARD_CACHE_DIR", "http")
+def cache_dir(env_var, name):
+    return os.environ.get(env_var, os.path.join(CACHE_ROOT, name))
+
+
+# Temporary file name next to path, unique per process and thread
+def temp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+# Write bytes or text to path atomically
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = temp_path(path)
+    with open(tmp_path, "wb" if isinstance(data, bytes) else "w") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# Read a JSON file, None if it is missing or unreadable
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    write_atomic(path, json.dumps(data))
+
+
+# Short stable key for a function call's arguments (e.g. separate files per year range)
+def call_key(args, kwargs):
+    return hashlib.sha1(repr((args, sorted(kwargs.items()))).encode("utf-8")).hexdigest()[:12]
+
+
+# Path of a stored frame without its extension
+def frame_path(base):
+    return base + EXTENSION
+
+
+def frame_exists(base):
+    return os.path.exists(frame_path(base))
+
+
+def save_frame(base, df):
+    path = frame_path(base)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = temp_path(path)
+    if HAS_PYARROW:
+        df.reset_index(drop=True).to_feather(tmp_path)
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_frame(base):
+    path = frame_path(base)
+    if HAS_PYARROW:
+        return pd.read_feather(path)
+    return pd.read_pickle(path)
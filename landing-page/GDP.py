@@ -1,16 +1,31 @@
-from dash import html, dash_table, dcc, Input, Output
+from dash import html, dash_table, dcc, Input, Output, State, ctx
 from dash.dash_table.Format import Format, Scheme
-import plotly.express as px
-from GDPDataLoader import get_g10_gdp_change, get_g10_gdp_timeseries  # load in the functions for the underlying table/chart dataframes
+from GDPDataLoader import get_g10_gdp_timeseries, build_gdp_matrix, gdp_change_from_matrix  # load in the functions for the underlying table/chart dataframes
+from DataRegistry import register_dataset, get_dataset, dataset_version, TTL_WORLD_BANK
+from LineCharts import build_country_index, line_figure, line_trace, country_colours, patch_traces, uses_webgl
+from FigureCache import figure_cache
+from Metrics import timed, timed_callback
 
-# Load data for table (GDP change 2023-2024)
-df_gdp_change = get_g10_gdp_change(2023, 2024).reset_index()
+# Register time series data for line chart (2000-2024), fetched on first use
+register_dataset('gdp_timeseries', lambda: get_g10_gdp_timeseries(2000, 2024), ttl=TTL_WORLD_BANK, snapshot=True,
+                 source='world_bank')
 
-# Load time series data for line chart (2000-2024)
-df_timeseries = get_g10_gdp_timeseries(2000, 2024)
+# Register a Country x Year GDP matrix for the table, built once from the timeseries already in memory
+# (the change between any two years is then a column operation)
+register_dataset('gdp_matrix', lambda: build_gdp_matrix(get_dataset('gdp_timeseries')),
+                 depends_on=['gdp_timeseries'])
+
+# Years the table compares when the tab is first opened
+DEFAULT_START_YEAR = 2023
+DEFAULT_END_YEAR = 2024
+
+# Register per-country arrays the line chart is assembled from
+register_dataset('gdp_index', lambda: build_country_index(get_dataset('gdp_timeseries'), 'Year', 'GDP (Trillions US$)'),
+                 depends_on=['gdp_timeseries'])
+
+# Datasets the tab layout is built from (it is rebuilt when one of them changes)
+LAYOUT_DATASETS = ['gdp_timeseries', 'gdp_matrix']
 
-# Prepare data for display table
-df_display = df_gdp_change[['Country', 'GDP Change (Trillions)', '% Change']].copy()
 # Map flag emojis to countries
 flag_map = {
     'United States': '🇺🇸',
@@ -26,9 +41,6 @@ flag_map = {
     'Belgium': '🇧🇪'
 }
 
-df_display['Country'] = df_display['Country'].apply(lambda x: f"{flag_map.get(x, '')} {x}")
-df_display['% Change'] = df_display['% Change'].round(2)
-
 def format_percent_change(val):
     if val > 0:
         return f"↑ {val}%"
@@ -37,107 +49,184 @@ def format_percent_change(val):
     else:
         return f"{val}%"
 
-df_display['% Change'] = df_display['% Change'].apply(format_percent_change)
-
-data_table = dash_table.DataTable(
-    columns=[
-        {"name": "Country", "id": "Country"},
-        {"name": "GDP Change (Trillions)", "id": "GDP Change (Trillions)", 'type': 'numeric', 'format': Format(precision=2, scheme=Scheme.fixed)},
-        {"name": "% Change", "id": "% Change", "type": "text"},
-    ],
-    data=df_display.to_dict('records'),
-    style_table={'overflowX': 'auto', 'maxWidth': '700px'},
-    style_cell={
-        'fontSize': '10px',
-        'padding': '6px 8px',
-        'minWidth': '80px', 'width': '120px', 'maxWidth': '150px',
-        'whiteSpace': 'normal',
-        'textAlign': 'left',
-    },
-    style_header={
-        'backgroundColor': 'rgb(230, 230, 230)',
-        'fontWeight': 'bold',
-        'fontSize': '13px',
-        'textAlign': 'left'
-    },
-    style_data_conditional=[
-        {
-            'if': {
-                'filter_query': '{% Change} contains "↑"',
-                'column_id': '% Change'
-            },
-            'color': 'green',
-            'fontWeight': 'bold',
+# Prepare data for display table
+def build_display_table(df_gdp_change):
+    df_display = df_gdp_change[['Country', 'GDP Change (Trillions)', '% Change']].copy()
+    df_display['Country'] = df_display['Country'].apply(lambda x: f"{flag_map.get(x, '')} {x}")
+    df_display['% Change'] = df_display['% Change'].round(2)
+    df_display['% Change'] = df_display['% Change'].apply(format_percent_change)
+    return df_display
+
+def build_data_table(df_display):
+    return dash_table.DataTable(
+        id='gdp-change-table',
+        columns=[
+            {"name": "Country", "id": "Country"},
+            {"name": "GDP Change (Trillions)", "id": "GDP Change (Trillions)", 'type': 'numeric', 'format': Format(precision=2, scheme=Scheme.fixed)},
+            {"name": "% Change", "id": "% Change", "type": "text"},
+        ],
+        data=df_display.to_dict('records'),
+        style_table={'overflowX': 'auto', 'maxWidth': '700px'},
+        style_cell={
+            'fontSize': '10px',
+            'padding': '6px 8px',
+            'minWidth': '80px', 'width': '120px', 'maxWidth': '150px',
+            'whiteSpace': 'normal',
+            'textAlign': 'left',
         },
-        {
-            'if': {
-                'filter_query': '{% Change} contains "↓"',
-                'column_id': '% Change'
-            },
-            'color': 'red',
+        style_header={
+            'backgroundColor': 'rgb(230, 230, 230)',
             'fontWeight': 'bold',
+            'fontSize': '13px',
+            'textAlign': 'left'
         },
-    ],
-    page_size=10,
-)
+        style_data_conditional=[
+            {
+                'if': {
+                    'filter_query': '{% Change} contains "↑"',
+                    'column_id': '% Change'
+                },
+                'color': 'green',
+                'fontWeight': 'bold',
+            },
+            {
+                'if': {
+                    'filter_query': '{% Change} contains "↓"',
+                    'column_id': '% Change'
+                },
+                'color': 'red',
+                'fontWeight': 'bold',
+            },
+        ],
+        page_size=10,
+    )
+
+# Table rows for the change in GDP between two years
+def change_table_rows(year_start, year_end):
+    # Compare the earlier year with the later one whichever order they were picked in
+    year_start, year_end = sorted((year_start, year_end))
+    df_gdp_change = gdp_change_from_matrix(get_dataset('gdp_matrix'), year_start, year_end).reset_index()
+    return build_display_table(df_gdp_change).to_dict('records')
 
-# Dropdown options for filtering countries (without flags)
-dropdown_options = [{"label": c, "value": c} for c in sorted(df_timeseries["Country"].unique())]
+def change_table_caption(year_start, year_end):
+    year_start, year_end = sorted((year_start, year_end))
+    return f"The table above shows the % change in GDP from {year_start} to {year_end} for the G10 nations."
 
-layout = html.Div([
-    html.H1("Let's Explore Gross Domestic Product (GDP)", style={'color': '#003366', 'fontSize': '20px'}),
-    html.H3("G10 Countries % GDP Change", style={'color': '#666', 'marginTop': '0'}),
+# Build the page layout from the loaded data (called when the tab is opened)
+def layout():
+    df_timeseries = get_dataset('gdp_timeseries')
+    years = [int(y) for y in get_dataset('gdp_matrix').columns]
+    start_year = DEFAULT_START_YEAR if DEFAULT_START_YEAR in years else years[0]
+    end_year = DEFAULT_END_YEAR if DEFAULT_END_YEAR in years else years[-1]
+    year_options = [{"label": str(y), "value": y} for y in years]
+    data_table = build_data_table(build_display_table(
+        gdp_change_from_matrix(get_dataset('gdp_matrix'), start_year, end_year).reset_index()
+    ))
+
+    # Dropdown options for filtering countries (without flags)
+    dropdown_options = [{"label": c, "value": c} for c in sorted(df_timeseries["Country"].unique())]
+
+    return html.Div([
+        html.H1("Let's Explore Gross Domestic Product (GDP)", style={'color': '#003366', 'fontSize': '20px'}),
+        html.H3("G10 Countries % GDP Change", style={'color': '#666', 'marginTop': '0'}),
     
-    html.Div([
-        # Left side: DataTable and narrative
         html.Div([
-            data_table,
-            html.P(
-                "The table above shows the % change in GDP from 2023 to 2024 for the G10 nations.",
-                style={'fontSize': '14px', 'color': '#555', 'marginTop': '10px'}
-            ),
-            html.H3(
-                "Why does GDP matter to the UK economy?",
-                style={'color': '#666', 'marginTop': '20px'}
-            ),
-            html.P("🌱 GDP is a good indicator of whether the UK economy is growing or shrinking.",
-                   style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'}),
-            html.P("💻 A stronger GDP usually means better business conditions and more jobs.",
-                   style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'}),
-            html.P("🚌 The government uses GDP to decide how much to spend on public services like schools, healthcare and transport.",
-                   style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'})
-        ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}),
-
-        # Right side: Country filter and line graph
-        html.Div([
-            dcc.Dropdown(
-                id='country-filter',
-                options=dropdown_options,
-                multi=True,
-                value=[option['value'] for option in dropdown_options],  # default select all
-                placeholder="Select countries to display"
-            ),
-            dcc.Graph(id='gdp-line-chart')
-        ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top', 'paddingLeft': '20px'})
+            # Left side: DataTable and narrative
+            html.Div([
+                # Start and end year selectors for the table
+                html.Div([
+                    html.Span("Compare ", style={'fontSize': '14px', 'color': '#555'}),
+                    dcc.Dropdown(id='gdp-start-year', options=year_options, value=start_year, clearable=False,
+                                 style={'width': '100px', 'display': 'inline-block', 'verticalAlign': 'middle'}),
+                    html.Span(" with ", style={'fontSize': '14px', 'color': '#555'}),
+                    dcc.Dropdown(id='gdp-end-year', options=year_options, value=end_year, clearable=False,
+                                 style={'width': '100px', 'display': 'inline-block', 'verticalAlign': 'middle'}),
+                ], style={'marginBottom': '10px'}),
+                data_table,
+                html.P(
+                    change_table_caption(start_year, end_year),
+                    id='gdp-change-caption',
+                    style={'fontSize': '14px', 'color': '#555', 'marginTop': '10px'}
+                ),
+                html.H3(
+                    "Why does GDP matter to the UK economy?",
+                    style={'color': '#666', 'marginTop': '20px'}
+                ),
+                html.P("🌱 GDP is a good indicator of whether the UK economy is growing or shrinking.",
+                       style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'}),
+                html.P("💻 A stronger GDP usually means better business conditions and more jobs.",
+                       style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'}),
+                html.P("🚌 The government uses GDP to decide how much to spend on public services like schools, healthcare and transport.",
+                       style={'fontSize': '14px', 'color': '#555', 'marginTop': '5px'})
+            ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}),
+
+            # Right side: Country filter and line graph
+            html.Div([
+                dcc.Dropdown(
+                    id='country-filter',
+                    options=dropdown_options,
+                    multi=True,
+                    value=[option['value'] for option in dropdown_options],  # default select all
+                    placeholder="Select countries to display"
+                ),
+                dcc.Graph(id='gdp-line-chart'),
+                # Countries currently drawn on the chart, in trace order (for partial updates)
+                dcc.Store(id='gdp-traces')
+            ], style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top', 'paddingLeft': '20px'})
+        ])
     ])
-])
+
+def update_gdp_line_chart(selected_countries, drawn):
+    if not selected_countries:
+        return {}, None
+    index = get_dataset('gdp_index')
+    version = dataset_version('gdp_index')
+
+    # Only send the added/removed traces when the chart already shows this version of the data
+    if drawn and drawn['countries'] and drawn['version'] == version and ctx.triggered_id == 'country-filter':
+        colours = country_colours(index)
+        patched, order = patch_traces(
+            drawn['countries'],
+            [c for c in selected_countries if c in index],
+            lambda c: line_trace(index, c, 'Year', 'GDP (Trillions US$)', markers=True, colour=colours[c],
+                                 webgl=drawn.get('webgl', False))
+        )
+        return patched, {'countries': order, 'version': version, 'webgl': drawn.get('webgl', False)}
+
+    def build():
+        with timed('gdp', 'figure_build'):
+            return line_figure(
+                index,
+                sorted(selected_countries),
+                title="GDP Over Time (Trillions US$)",
+                x_title='Year',
+                y_title='GDP (Trillions US$)',
+                markers=True
+            )
+
+    key = figure_cache.make_key('gdp', version, selected_countries)
+    fig = figure_cache.get_or_build(key, build)
+    return fig, {'countries': [c for c in sorted(selected_countries) if c in index], 'version': version,
+                 'webgl': uses_webgl(fig)}
+
+def update_gdp_change_table(year_start, year_end):
+    if year_start is None or year_end is None:
+        return [], ""
+    return change_table_rows(year_start, year_end), change_table_caption(year_start, year_end)
 
 def register_callbacks(app):
-    @app.callback(
+    app.callback(
+        Output('gdp-change-table', 'data'),
+        Output('gdp-change-caption', 'children'),
+        Input('gdp-start-year', 'value'),
+        Input('gdp-end-year', 'value'),
+        prevent_initial_call=True
+    )(timed_callback('update_gdp_change_table')(update_gdp_change_table))
+
+
+    app.callback(
         Output('gdp-line-chart', 'figure'),
-        Input('country-filter', 'value')
-    )
-    def update_gdp_line_chart(selected_countries):
-        if not selected_countries:
-            return {}
-        filtered_df = df_timeseries[df_timeseries['Country'].isin(selected_countries)]
-        fig = px.line(
-            filtered_df,
-            x='Year',
-            y='GDP (Trillions US$)',
-            color='Country',
-            markers=True,
-            title="GDP Over Time (Trillions US$)"
-        )
-        fig.update_layout(legend_title_text='Country')
-        return fig
+        Output('gdp-traces', 'data'),
+        Input('country-filter', 'value'),
+        State('gdp-traces', 'data')
+    )(timed_callback('update_gdp_line_chart')(update_gdp_line_chart))
@@ -1,25 +1,91 @@
 import requests
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from DataFetch import fetch
+from Metrics import timed
+from WarmStart import warm_start, stored_output
+from SingleFlight import single_flight
+from CompactFrames import compact_frame
 
-def get_g10_gdp_change(year_start=2023, year_end=2024):
-    
-    g10_codes = ['BE', 'CA', 'FR', 'DE', 'IT', 'JP', 'NL', 'SE', 'CH', 'GB', 'US']
-
-    all_data = []
-    for code in g10_codes:
-        url = f"https://api.worldbank.org/v2/country/{code}/indicator/NY.GDP.MKTP.CD"
-        params = {
-            "format": "json",
-            "date": f"{year_start}:{year_end}",
-            "per_page": 100
-        }
-        response = requests.get(url, params=params)
-        data = response.json()
-
-        if len(data) < 2:
-            continue
-
-        records = data[1]
+G10_CODES = ['BE', 'CA', 'FR', 'DE', 'IT', 'JP', 'NL', 'SE', 'CH', 'GB', 'US']
+
+GDP_INDICATOR = "NY.GDP.MKTP.CD"
+
+# Countries per World Bank request (multi-country syntax BE;CA;FR;...), keeps URLs a sensible length
+COUNTRIES_PER_REQUEST = 40
+
+# Most chunks fetched at the same time for larger country sets
+MAX_CONCURRENT_REQUESTS = 4
+
+# Bump when the columns of the timeseries frame change
+GDP_TIMESERIES_SCHEMA = 2
+
+
+# URL and query parameters of one page of a multi-country World Bank indicator query
+def indicator_request(codes, indicator, start_year, end_year, page=1):
+    url = f"https://api.worldbank.org/v2/country/{';'.join(codes)}/indicator/{indicator}"
+    params = {
+        "format": "json",
+        "date": f"{start_year}:{end_year}",
+        "per_page": 1000,
+        "page": page
+    }
+    return url, params
+
+
+# Fetch every page of an indicator for a batch of countries in one World Bank query
+def fetch_indicator_batch(codes, indicator, start_year, end_year):
+    records = []
+    page = 1
+    pages = 1
+    while page <= pages:
+        url, params = indicator_request(codes, indicator, start_year, end_year, page)
+        response = fetch(url, params=params, source="world_bank")
+        with timed("world_bank", "json_parse"):
+            data = response.json()
+
+        # An error or empty result comes back as a single message element
+        if len(data) < 2 or data[1] is None:
+            break
+
+        pages = int(data[0].get("pages", 1))
+        records.extend(data[1])
+        page += 1
+    return records
+
+
+# Fetch an indicator for any number of countries: one batched query, or bounded concurrent batches
+def fetch_indicator(codes, indicator, start_year, end_year):
+    chunks = [codes[i:i + COUNTRIES_PER_REQUEST] for i in range(0, len(codes), COUNTRIES_PER_REQUEST)]
+
+    def fetch_chunk(chunk):
+        try:
+            return fetch_indicator_batch(chunk, indicator, start_year, end_year)
+        except requests.HTTPError:
+            return []
+
+    if len(chunks) == 1:
+        return fetch_chunk(chunks[0])
+
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+        results = pool.map(fetch_chunk, chunks)
+    return [record for chunk_records in results for record in chunk_records]
+
+
+# Sources the timeseries depends on: the first page of each country batch
+def gdp_timeseries_sources(start_year=2000, end_year=2024, countries=G10_CODES):
+    codes = list(countries)
+    return [indicator_request(codes[i:i + COUNTRIES_PER_REQUEST], GDP_INDICATOR, start_year, end_year)
+            for i in range(0, len(codes), COUNTRIES_PER_REQUEST)]
+
+
+@single_flight("gdp_timeseries", stale=stored_output("gdp_timeseries", GDP_TIMESERIES_SCHEMA))
+@warm_start("gdp_timeseries", GDP_TIMESERIES_SCHEMA, gdp_timeseries_sources)
+def get_g10_gdp_timeseries(start_year=2000, end_year=2024, countries=G10_CODES):
+    records = fetch_indicator(list(countries), GDP_INDICATOR, start_year, end_year)
+
+    with timed("world_bank", "frame_build"):
+        all_data = []
         for record in records:
             country = record["country"]["value"]
             year = int(record["date"])
@@ -31,79 +97,54 @@ def get_g10_gdp_change(year_start=2023, year_end=2024):
                     "GDP (Current US$)": value
                 })
 
-    df = pd.DataFrame(all_data)
+        df = pd.DataFrame(all_data, columns=["Country", "Year", "GDP (Current US$)"])
+        df.sort_values(by=["Country", "Year"], inplace=True)
+        df.reset_index(drop=True, inplace=True)
 
-    # Pivot to have years as columns
-    pivot_df = df.pivot(index="Country", columns="Year", values="GDP (Current US$)")
+        # Add GDP in trillions
+        df["GDP (Trillions US$)"] = df["GDP (Current US$)"] / 1e12
+        df["GDP (Trillions US$)"] = df["GDP (Trillions US$)"].round(2)
+
+    # Country names as a categorical, the rounded trillions fit in float32
+    # (raw US$ values stay float64, they are used for the change table)
+    return compact_frame(df, categories=["Country"], float32=["GDP (Trillions US$)"])
+
+
+# Build a Country x Year matrix of GDP (current US$) once from the timeseries
+def build_gdp_matrix(df):
+    return df.pivot(index="Country", columns="Year", values="GDP (Current US$)").sort_index(axis=1)
+
+
+# Build the GDP change table for any two years from the matrix with column operations (no network calls)
+def gdp_change_from_matrix(matrix, year_start, year_end):
+    years = matrix.reindex(columns=sorted({year_start, year_end}))
+    start = years[year_start]
+    end = years[year_end]
 
     # Drop countries with missing data
-    pivot_df = pivot_df.dropna()
-
-    # Calculate change and percent change
-    pivot_df["GDP Change (US$)"] = pivot_df[year_end] - pivot_df[year_start]
-    pivot_df["% Change"] = (pivot_df["GDP Change (US$)"] / pivot_df[year_start]) * 100
-
-    # Convert to trillions and round
-    pivot_df["GDP Start (Trillions)"] = pivot_df[year_start] / 1e12
-    pivot_df["GDP End (Trillions)"] = pivot_df[year_end] / 1e12
-    pivot_df["GDP Change (Trillions)"] = pivot_df["GDP Change (US$)"] / 1e12
-
-    pivot_df = pivot_df.round({
-        "GDP Start (Trillions)": 2,
-        "GDP End (Trillions)": 2,
-        "GDP Change (Trillions)": 2,
-        "% Change": 2
+    valid = start.notna() & end.notna()
+    start, end = start[valid], end[valid]
+
+    # Calculate change and percent change, converted to trillions and rounded
+    change = end - start
+    result_df = pd.DataFrame({
+        "GDP Start (Trillions)": (start / 1e12).round(2),
+        "GDP End (Trillions)": (end / 1e12).round(2),
+        "GDP Change (Trillions)": (change / 1e12).round(2),
+        "% Change": (change / start * 100).round(2)
     })
 
     # Sort by absolute GDP change descending
-    result_df = pivot_df.sort_values(by="GDP Change (US$)", ascending=False)[[
-        "GDP Start (Trillions)",
-        "GDP End (Trillions)",
-        "GDP Change (Trillions)",
-        "% Change"
-    ]]
+    return result_df.loc[change.sort_values(ascending=False).index]
 
-    return result_df
-
-import requests
-import pandas as pd
-
-def get_g10_gdp_timeseries(start_year=2000, end_year=2024):
-    g10_codes = ['BE', 'CA', 'FR', 'DE', 'IT', 'JP', 'NL', 'SE', 'CH', 'GB', 'US']
-    all_data = []
-
-    for code in g10_codes:
-        url = f"https://api.worldbank.org/v2/country/{code}/indicator/NY.GDP.MKTP.CD"
-        params = {
-            "format": "json",
-            "date": f"{start_year}:{end_year}",
-            "per_page": 100
-        }
-        response = requests.get(url, params=params)
-        if response.status_code != 200:
-            continue
-        data = response.json()
-
-        if len(data) < 2:
-            continue
-
-        records = data[1]
-        for record in records:
-            country = record["country"]["value"]
-            year = int(record["date"])
-            value = record["value"]
-            if value is not None:
-                all_data.append({
-                    "Country": country,
-                    "Year": year,
-                    "GDP (Current US$)": value
-                })
 
-    df = pd.DataFrame(all_data)
-    df.sort_values(by=["Country", "Year"], inplace=True)
+# Build the GDP change table for two years from an already loaded timeseries (no network calls)
+def gdp_change_from_timeseries(df, year_start, year_end):
+    return gdp_change_from_matrix(build_gdp_matrix(df), year_start, year_end)
 
-    # Add GDP in trillions
-    df["GDP (Trillions US$)"] = df["GDP (Current US$)"] / 1e12
-    df["GDP (Trillions US$)"] = df["GDP (Trillions US$)"].round(2)
 
-    return df
+def get_g10_gdp_change(year_start=2023, year_end=2024, timeseries=None):
+    # Only fetch when a timeseries covering both years has not been passed in
+    if timeseries is None:
+        timeseries = get_g10_gdp_timeseries(year_start, year_end)
+    return gdp_change_from_timeseries(timeseries, year_start, year_end)
@@ -0,0 +1,127 @@
+# HttpCaching.py
+# Compression and HTTP caching for the Flask server behind the Dash app.
+# Responses are gzip/brotli compressed by flask-compress when it is installed (Dash's compress
+# option); without it, JSON, JavaScript, CSS and HTML responses are gzipped here with the standard
+# library. The layout and dependency responses (GET requests whose body only changes with the
+# loaded datasets) get a content ETag and "no-cache" Cache-Control: browsers may keep them, but
+# revalidate each time and get an empty 304 Not Modified when nothing changed.
+# Callback responses (_dash-update-component) are not given ETags: they are answers to POST
+# requests, which browsers and proxies never store or revalidate (Dash's renderer sends no
+# If-None-Match with them), so an ETag would only cost a hash of every payload. Deterministic
+# callback outputs are reused on the server instead, by FigureCache (same selection against the
+# same dataset version returns the stored figure without rebuilding it).
+
+import gzip
+import hashlib
+import logging
+import threading
+
+try:
+    import flask_compress  # noqa: F401
+    HAS_FLASK_COMPRESS = True
+except ImportError:
+    HAS_FLASK_COMPRESS = False
+
+logger = logging.getLogger(__name__)
+
+# Dash GET endpoints (under any url prefix) whose responses depend only on the loaded datasets
+CACHEABLE_PATHS = ("/_dash-layout", "/_dash-dependencies")
+CACHE_CONTROL = "no-cache"
+
+# Stdlib gzip fallback: content types worth compressing, and the smallest body compressed
+COMPRESS_MIMETYPES = ("application/json", "application/javascript", "text/javascript", "text/css", "text/html")
+COMPRESS_MIN_BYTES = 500
+COMPRESS_LEVEL = 6
+
+_stats_lock = threading.Lock()
+_stats = {
+    "responses": 0,      # cacheable responses given an ETag
+    "not_modified": 0,   # answered with 304 because the client already had the same body
+    "bytes_saved": 0     # response bytes not sent thanks to a 304
+}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+# Keyword arguments for dash.Dash: compress responses when flask-compress is available
+# (its defaults cover JSON, JavaScript and CSS, with brotli preferred over gzip when installed)
+def compression_options():
+    if not HAS_FLASK_COMPRESS:
+        logger.info("flask-compress is not installed, responses are gzipped with the standard library")
+    return {"compress": HAS_FLASK_COMPRESS}
+
+
+# Strong ETag of a response body
+def body_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+# Whether the stdlib fallback should gzip this response
+def _should_gzip(request, response):
+    return (not HAS_FLASK_COMPRESS and response.status_code == 200 and not response.direct_passthrough
+            and response.mimetype in COMPRESS_MIMETYPES and "Content-Encoding" not in response.headers
+            and (response.content_length or 0) >= COMPRESS_MIN_BYTES)
+
+
+def _gzip(request, response, own_etag=False):
+    response.vary.add("Accept-Encoding")
+    if "gzip" not in request.accept_encodings:
+        return response
+    response.set_data(gzip.compress(response.get_data(), compresslevel=COMPRESS_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+    # The compressed body is a different representation, so another hook's strong ETag becomes weak
+    etag, weak = response.get_etag()
+    if etag and not weak and not own_etag:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# Add ETag/Cache-Control to the layout and dependency responses, answer matching If-None-Match with 304,
+# and gzip responses when flask-compress is not installed
+def register_http_caching(server):
+    from flask import request, request_finished, g
+
+    # Registered after Dash's compression hook, so this runs first and hashes the uncompressed body
+    @server.after_request
+    def add_cache_headers(response):
+        cacheable = (request.method == "GET" and request.path.endswith(CACHEABLE_PATHS)
+                     and response.status_code == 200 and not response.direct_passthrough
+                     and "ETag" not in response.headers)
+        compress = _should_gzip(request, response)
+        if not cacheable:
+            return _gzip(request, response) if compress else response
+
+        body = response.get_data()
+        etag = body_etag(body)
+        # Each encoding of the body gets its own ETag
+        if compress and "gzip" in request.accept_encodings:
+            etag += "-gzip"
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        g.cacheable_bytes = len(body)
+        _count("responses")
+
+        # flask-compress evaluates If-None-Match itself once the body is compressed
+        if HAS_FLASK_COMPRESS:
+            return response
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+        return _gzip(request, response, own_etag=True) if compress else response
+
+    # Count the 304s once every hook (including flask-compress) has run
+    def count_not_modified(sender, response, **extra):
+        if response.status_code == 304 and "cacheable_bytes" in g:
+            _count("not_modified")
+            _count("bytes_saved", g.cacheable_bytes)
+
+    request_finished.connect(count_not_modified, server, weak=False)
+
+
+def response_cache_stats():
+    with _stats_lock:
+        return dict(_stats)
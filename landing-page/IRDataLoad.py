@@ -1,86 +1,175 @@
 # Import libraries
 import pandas as pd # For data manipulation
-import requests # For making HTTP requests
+import numpy as np # For array based lookups
 import zipfile # For handling zip files
-import io # For handling byte streams
-
-# Create a function to return the latest central bank interest rates for a subset of countries
-def get_latest_rates():
-    # Define the URL for the ZIP file for interest rate data from Bank of International Settlements
-    url = "https://data.bis.org/static/bulk/WS_CBPOL_csv_flat.zip"
-    # Send a GET request to the URL
-    response = requests.get(url)
-    # Produce an error if the request was unsuccessful
-    response.raise_for_status()
-
-    # Open the ZIP file from the GET response
-    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+from DataFetch import fetch # Shared cached HTTP layer
+from Metrics import timed # Stage timings for /metrics
+import logging # Warn when serving stored data
+import requests # Network errors fall back to the stored history
+import BISHistory # Incrementally updated local copy of the history, also reused across restarts
+import WarmStart # Offline mode switch
+from SingleFlight import single_flight # One refresh at a time across threads and workers
+from CompactFrames import compact_frame # Categorical labels and float32 rates in memory
+
+logger = logging.getLogger(__name__)
+
+# Define the URL for the ZIP file for interest rate data from Bank of International Settlements
+BIS_POLICY_RATES_URL = "https://data.bis.org/static/bulk/WS_CBPOL_csv_flat.zip"
+
+# Create a dictionary to map country codes to the correct flag emoji for the latest rate circles
+COUNTRY_FLAGS = {
+    "GB": "🇬🇧",
+    "US": "🇺🇸",
+    "JP": "🇯🇵",
+    "XE": "🇪🇺"
+}
+
+
+# BIS column prefixes used by the dashboard and the names they are renamed to
+BIS_COLUMNS = {
+    "REF_AREA": "Country",
+    "TIME_PERIOD": "Date",
+    "OBS_VALUE": "Interest Rate"
+}
+
+# Explicit dtypes for the columns read from the BIS file
+BIS_DTYPES = {
+    "REF_AREA": "category",
+    "TIME_PERIOD": "string",
+    "OBS_VALUE": "float64"
+}
+
+
+# Create a function to parse the policy rate CSV straight out of a BIS ZIP file (path or file-like object)
+def read_policy_rates_zip(source, engine="c"):
+    with zipfile.ZipFile(source) as z:
         # Find the first CSV file from the ZIP file
         csv_name = [name for name in z.namelist() if name.endswith(".csv")][0]
-        # Open and read the CSV file
-        with z.open(csv_name) as f:
-            # Decode the file content into a string, with error handling for decoding issues
-            content = f.read().decode('utf-8', errors='replace')
-            # Load the CSV content into a dataframe
-            df = pd.read_csv(io.StringIO(content), low_memory=False)
+
+        # Read just the header line to resolve full column names like "REF_AREA:Reference area"
+        with timed("bis", "zip_open"), z.open(csv_name) as f:
+            header = f.readline().decode('utf-8', errors='replace').strip().split(",")
+        columns = {}
+        for column in header:
+            column = column.strip('"')
+            prefix = column.split(":")[0]
+            if prefix in BIS_COLUMNS:
+                columns[column] = prefix
+
+        # Stream the ZIP member into the CSV reader, parsing only the three columns we use
+        with timed("bis", "csv_parse"), z.open(csv_name) as f:
+            kwargs = {
+                "usecols": list(columns),
+                "dtype": {column: BIS_DTYPES[prefix] for column, prefix in columns.items()},
+                "engine": engine
+            }
+            if engine != "pyarrow":
+                kwargs["encoding_errors"] = "replace"
+            df = pd.read_csv(f, **kwargs)
 
     # Rename columns to make user friendly
-    df.rename(columns={
-        "REF_AREA:Reference area": "Country",
-        "TIME_PERIOD:Time period or range": "Date",
-        "OBS_VALUE:Observation Value": "Interest Rate"
-    }, inplace=True)
-
-    # Data cleanse and filter for latest date per country
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce") # Convert the Date column to datetime format, any invalid dates result in Not a Time
-    df = df.dropna(subset=["Date", "Interest Rate"]) # Drop rows where Date or Interest rate is missing
-    df.sort_values("Date", ascending=False, inplace=True) # Sort dataframe by date in descending order
-    df = df[df["Country"].isin(["GB: United Kingdom", "US: United States", "JP: Japan", "XE: Euro area"])] # Filter dataframe for the countries GB, UK, JP and Euro Zone
-    df = df.groupby("Country").first().reset_index() # Group data by country and select the latest record for each group
-
-    # Create a dictionary to map country codes and names to the correct flag emoji
-    country_flags = {
-        "GB: United Kingdom": "🇬🇧",
-        "US: United States": "🇺🇸",
-        "JP: Japan": "🇯🇵",
-        "XE: Euro area": "🇪🇺"
-    }
-    # Add a Flag column to the dataframe by mapping each country to its flag
-    df["Flag"] = df["Country"].map(country_flags)
-
-    # Clean country display names by removing country code and colon
-    df["Country"] = df["Country"].str.replace(r'^[A-Z]{2}:\s*', '', regex=True)
-    
-    return df
+    return df.rename(columns={column: BIS_COLUMNS[prefix] for column, prefix in columns.items()})
+
+
+# Create a function to download the BIS policy rate file once and build a cleaned canonical table
+# With incremental=True only rows newer than the locally stored history are cleaned and merged in.
+# The stored history (BISHistory.py) is the one local copy: it is served while another worker
+# refreshes, when BIS cannot be reached and in offline mode (bump BISHistory.HISTORY_VERSION
+# when the columns or dtypes of the canonical table change).
+@single_flight("policy_rates", stale=BISHistory.stored_history)
+def load_policy_rates(engine="c", incremental=True):
+    if WarmStart.OFFLINE:
+        history = BISHistory.stored_history()
+        if history is None:
+            raise RuntimeError("Offline mode and no stored BIS policy rate history")
+        return history
+
+    # Download the ZIP through the shared cache (a 304 if BIS has not published a new file)
+    try:
+        response = fetch(BIS_POLICY_RATES_URL, source="bis")
+    except requests.RequestException:
+        history = BISHistory.stored_history()
+        if history is None:
+            raise
+        logger.warning("BIS unreachable, serving the stored policy rate history")
+        return history
+
+    # Same file as last time: the stored history is already up to date
+    fingerprint = response.fingerprint()
+    if incremental:
+        history = BISHistory.load_if_unchanged(fingerprint)
+        if history is not None:
+            return history
+
+    # Parse straight from the cached file on disk
+    df = read_policy_rates_zip(response.path, engine=engine)
+
+    if incremental:
+        return BISHistory.update_history(df, clean_policy_rates, fingerprint)
+    return clean_policy_rates(df)
+
+
+# Create a function to turn the raw Country/Date/Interest Rate columns into the canonical table
+def clean_policy_rates(df):
+    # Convert dates, any invalid dates result in Not a Time
+    with timed("bis", "date_parse"):
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+
+    with timed("bis", "clean"):
+        # Split the "GB: United Kingdom" style label into a country code and a clean display name
+        # (done once per distinct label rather than once per row)
+        labels = df["Country"].astype("category")
+        categories = labels.cat.categories.to_series()
+        codes = categories.str.extract(r'^([A-Z]{2}):', expand=False).to_numpy(dtype=object)
+        names = categories.str.replace(r'^[A-Z]{2}:\s*', '', regex=True).to_numpy(dtype=object)
+        positions = labels.cat.codes.to_numpy()
+        valid = positions >= 0
+        df["Code"] = np.where(valid, codes[positions], None)
+        df["Country"] = np.where(valid, names[positions], None)
+
+        # Drop missing values
+        df = df.dropna(subset=["Date", "Interest Rate", "Country"])
+
+        # Sort once by country and date so every view can be sliced from this table
+        df = df.sort_values(["Country", "Date"], kind="stable").reset_index(drop=True)
+
+    # Store the repeated labels as categoricals and the rates (two decimal places) as float32
+    return compact_frame(df[["Code", "Country", "Date", "Interest Rate"]],
+                         categories=["Code", "Country"], float32=["Interest Rate"])
+
+
+# Create a function to find the row position of the latest observation for each country
+def latest_row_positions(df):
+    # The canonical table is sorted by country then date, so the last row of each country block is its latest value
+    countries = df["Country"].to_numpy()
+    if len(countries) == 0:
+        return np.array([], dtype=np.int64)
+    block_ends = np.flatnonzero(countries[1:] != countries[:-1])
+    return np.append(block_ends, len(countries) - 1)
 
 
-def get_full_timeseries(countries=None, start_date="2005-01-01"):
-    url = "https://data.bis.org/static/bulk/WS_CBPOL_csv_flat.zip"
-    response = requests.get(url)
-    response.raise_for_status()
+# Create a function to return the latest central bank interest rates for a subset of countries
+def get_latest_rates(canonical=None):
+    # Build the canonical table if one has not been passed in
+    if canonical is None:
+        canonical = load_policy_rates()
 
-    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-        csv_name = [name for name in z.namelist() if name.endswith(".csv")][0]
-        with z.open(csv_name) as f:
-            content = f.read().decode('utf-8', errors='replace')
-            df = pd.read_csv(io.StringIO(content), low_memory=False)
+    # Look up the latest record for each country, then filter for the countries GB, US, JP and Euro Zone
+    df = canonical.iloc[latest_row_positions(canonical)]
+    df = df[df["Code"].isin(COUNTRY_FLAGS.keys())]
 
-    # Rename columns for easier use
-    df.rename(columns={
-        "REF_AREA:Reference area": "Country",
-        "TIME_PERIOD:Time period or range": "Date",
-        "OBS_VALUE:Observation Value": "Interest Rate"
-    }, inplace=True)
+    # Order by country code and add a Flag column by mapping each country to its flag
+    df = df.sort_values("Code").reset_index(drop=True)
+    df["Flag"] = df["Code"].map(COUNTRY_FLAGS)
 
-    # Convert types
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df["Interest Rate"] = pd.to_numeric(df["Interest Rate"], errors="coerce")
+    return df
 
-    # Clean country names (remove code prefix like "GB: ")
-    df["Country"] = df["Country"].str.replace(r'^[A-Z]{2}:\s*', '', regex=True)
 
-    # Drop missing values
-    df.dropna(subset=["Date", "Interest Rate", "Country"], inplace=True)
+def get_full_timeseries(countries=None, start_date="2005-01-01", canonical=None):
+    # Build the canonical table if one has not been passed in
+    if canonical is None:
+        canonical = load_policy_rates()
+    df = canonical
 
     # Filter by start_date
     if start_date:
@@ -90,10 +179,5 @@ def get_full_timeseries(countries=None, start_date="2005-01-01"):
     if countries:
         df = df[df["Country"].isin(countries)]
 
-    # Sort data for easier plotting
-    df.sort_values(["Country", "Date"], inplace=True)
-
-    return df
-
-
-
+    # Data is already sorted by country and date for easier plotting
+    return df.reset_index(drop=True)
@@ -1,16 +1,21 @@
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, State, callback, ctx, no_update
 import pandas as pd
-import plotly.express as px
 
 # Import your data loading functions
-from IRDataLoad import get_latest_rates, get_full_timeseries
+from IRDataLoad import load_policy_rates, get_latest_rates
+from DataRegistry import register_dataset, get_dataset, dataset_version, TTL_BIS
+from LineCharts import build_country_index, line_figure, line_trace, country_colours, patch_traces, uses_webgl
+from FigureCache import figure_cache
+from Downsample import downsample, window
+from Metrics import timed, timed_callback
 
-# Fetch data
-df_latest = get_latest_rates()   # For circles (latest snapshot for key countries)
-df_full = get_full_timeseries()  # For line chart (full timeseries for all countries)
-
-# Prepare dropdown options from all countries in full dataset
-all_countries = sorted(df_full['Country'].unique())
+# Register the data for this tab, it is fetched on first use rather than at import
+# Both views are derived from the same cleaned table
+register_dataset('policy_rates', load_policy_rates, ttl=TTL_BIS, snapshot=True, source='bis')
+register_dataset('policy_rates_latest', lambda: get_latest_rates(get_dataset('policy_rates')),
+                 depends_on=['policy_rates'])   # For circles (latest snapshot for key countries)
+register_dataset('policy_rates_index', lambda: build_country_index(get_dataset('policy_rates'), 'Date', 'Interest Rate'),
+                 depends_on=['policy_rates'])  # Per-country arrays the line chart is assembled from (full history, the range control slices it)
 
 # Helper function to create a circular indicator for each country's interest rate
 def rate_circle(country, rate, flag):
@@ -36,109 +41,223 @@ def rate_circle(country, rate, flag):
         ])
     ])
 
-# Format the latest UK date for header display
-uk_date = df_latest.loc[df_latest['Country'] == 'United Kingdom', 'Date'].max()
-formatted_date = uk_date.strftime('%d %B %Y') if pd.notna(uk_date) else "N/A"
-
-# Define your Dash page layout
-interest_rates_layout = html.Div(style={'padding': '20px', 'fontFamily': 'Arial'}, children=[
-
-    # Title and subtitle
-    html.Div(style={'textAlign': 'left'}, children=[
-        html.H1(
-            "Let’s Explore Central Bank Interest Rates",
-            style={'color': '#003366', 'fontSize': '20px', 'marginBottom': '5px'}
-        ),
-        # Sub heading title with dynamic date
-        html.H3(f"Current Central Bank Interest Rates As At {formatted_date}", style={'color': '#666', 'marginTop': '0'})
-    ]),
-
-    # Main content: Circles left, line chart right
-    html.Div(style={'display': 'flex', 'flexDirection': 'row', 'marginTop': '30px'}, children=[
-
-        # Left column: Circles and commentary (fixed width)
-        html.Div(style={'flex': '1', 'minWidth': '360px'}, children=[
-            html.Div(style={
-                'display': 'flex',
-                'flexWrap': 'wrap',
-                'justifyContent': 'start'
-            }, children=[
-                rate_circle(row['Country'], row['Interest Rate'], row['Flag']) for _, row in df_latest.iterrows()
-            ]),
+# Datasets the tab layout is built from (it is rebuilt when one of them changes)
+LAYOUT_DATASETS = ['policy_rates_latest', 'policy_rates_index']
 
-            # Chart narrative below the interest rate circles
-            html.Div(
-                "The circles above represent the current interest rates as set by the Central Banks.",
-                style={'marginTop': '20px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left'}
-            ),
-            # Text narrative explaining why Central Bank Interest Rates matter to the UK economy
-            html.H3(
-                "Why do Central Bank Interest Rates matter the UK economy?",
-                style={'marginTop': '15px', 'color': '#003366', 'textAlign': 'left'}
-            ),
-            # Point 1 text
-            html.Div(
-                "📈 They influence borrowing costs – Higher interest rates make loans more expensive for households and businesses, which can slow down spending and investment.",
-                style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
-            ),
-            # Point 2 text
-            html.Div(
-                "💻 They affect inflation – Raising rates can help reduce inflation, while lowering rates can boost economic activity when inflation is low.",
-                style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
+# Year the line chart starts from when the tab is first opened
+DEFAULT_START_YEAR = 2005
+
+# First and last year covered by the per-country arrays
+def year_bounds(index):
+    series = [xs for xs, _ in index.values() if len(xs)]
+    return pd.Timestamp(min(xs[0] for xs in series)).year, pd.Timestamp(max(xs[-1] for xs in series)).year
+
+# Build the Dash page layout from the loaded data (called when the tab is opened)
+def interest_rates_layout():
+    df_latest = get_dataset('policy_rates_latest')
+    index = get_dataset('policy_rates_index')
+
+    # Prepare dropdown options from all countries in the full history
+    all_countries = sorted(index)
+
+    # Format the latest UK date for header display
+    uk_date = df_latest.loc[df_latest['Country'] == 'United Kingdom', 'Date'].max()
+    formatted_date = uk_date.strftime('%d %B %Y') if pd.notna(uk_date) else "N/A"
+
+    # Years covered by the full history, for the date range control
+    first_year, last_year = year_bounds(index)
+    start_year = min(max(DEFAULT_START_YEAR, first_year), last_year)
+
+    # Define your Dash page layout
+    return html.Div(style={'padding': '20px', 'fontFamily': 'Arial'}, children=[
+
+        # Title and subtitle
+        html.Div(style={'textAlign': 'left'}, children=[
+            html.H1(
+                "Let’s Explore Central Bank Interest Rates",
+                style={'color': '#003366', 'fontSize': '20px', 'marginBottom': '5px'}
             ),
-            # Point 3 text
-            html.Div(
-                "💷 They shape the strength of the pound – Higher rates can attract foreign investment, strengthening the currency, which influences imports and exports.",
-                style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
-            )
+            # Sub heading title with dynamic date
+            html.H3(f"Current Central Bank Interest Rates As At {formatted_date}", style={'color': '#666', 'marginTop': '0'})
         ]),
 
-        # Right column: Create the line graph and filter for Central Bank interest rates over time
-        html.Div(style={'flex': '2', 'paddingLeft': '40px'}, children=[
-            dcc.Dropdown(
-                id='country-dropdown',
-                options=[{'label': c, 'value': c} for c in all_countries],
-                value=all_countries,  # Select all countries
-                multi=True,
-                placeholder="Select countries to display"
-            ),
+        # Main content: Circles left, line chart right
+        html.Div(style={'display': 'flex', 'flexDirection': 'row', 'marginTop': '30px'}, children=[
+
+            # Left column: Circles and commentary (fixed width)
+            html.Div(style={'flex': '1', 'minWidth': '360px'}, children=[
+                html.Div(style={
+                    'display': 'flex',
+                    'flexWrap': 'wrap',
+                    'justifyContent': 'start'
+                }, children=[
+                    rate_circle(row['Country'], row['Interest Rate'], row['Flag']) for _, row in df_latest.iterrows()
+                ]),
+
+                # Chart narrative below the interest rate circles
+                html.Div(
+                    "The circles above represent the current interest rates as set by the Central Banks.",
+                    style={'marginTop': '20px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left'}
+                ),
+                # Text narrative explaining why Central Bank Interest Rates matter to the UK economy
+                html.H3(
+                    "Why do Central Bank Interest Rates matter the UK economy?",
+                    style={'marginTop': '15px', 'color': '#003366', 'textAlign': 'left'}
+                ),
+                # Point 1 text
+                html.Div(
+                    "📈 They influence borrowing costs – Higher interest rates make loans more expensive for households and businesses, which can slow down spending and investment.",
+                    style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
+                ),
+                # Point 2 text
+                html.Div(
+                    "💻 They affect inflation – Raising rates can help reduce inflation, while lowering rates can boost economic activity when inflation is low.",
+                    style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
+                ),
+                # Point 3 text
+                html.Div(
+                    "💷 They shape the strength of the pound – Higher rates can attract foreign investment, strengthening the currency, which influences imports and exports.",
+                    style={'marginTop': '10px', 'fontSize': '14px', 'color': '#333', 'textAlign': 'left', 'maxWidth': '600px'}
+                )
+            ]),
+
+            # Right column: Create the line graph and filter for Central Bank interest rates over time
+            html.Div(style={'flex': '2', 'paddingLeft': '40px'}, children=[
+                dcc.Dropdown(
+                    id='country-dropdown',
+                    options=[{'label': c, 'value': c} for c in all_countries],
+                    value=all_countries,  # Select all countries
+                    multi=True,
+                    placeholder="Select countries to display"
+                ),
+
+                # Years shown on the chart, the full history is kept in memory and sliced per country
+                dcc.RangeSlider(
+                    id='interest-rate-date-range',
+                    min=first_year,
+                    max=last_year,
+                    step=1,
+                    value=[start_year, last_year],
+                    marks={y: str(y) for y in range(first_year - first_year % 10 + 10, last_year + 1, 10)},
+                    tooltip={'placement': 'bottom'}
+                ),
 
-            dcc.Graph(id='interest-rate-line-chart')
+                dcc.Graph(id='interest-rate-line-chart'),
+                # Countries currently drawn on the chart, in trace order (for partial updates)
+                dcc.Store(id='interest-rate-traces')
+            ])
         ])
     ])
-])
 
-# Dash callback to update line chart based on dropdown selection
+# Read the zoomed x-axis window from a Graph's relayoutData, None when zoomed out
+def zoom_window(relayout_data):
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        start, end = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        start, end = relayout_data['xaxis.range']
+    else:
+        return None
+    # Round to whole days so small pans reuse the same cached figure
+    return pd.Timestamp(start).floor('D'), pd.Timestamp(end).ceil('D')
+
+# Convert the range control's years into an inclusive [1 Jan start, 31 Dec end] window
+def year_window(year_range):
+    start, end = year_range
+    return pd.Timestamp(year=int(start), month=1, day=1), pd.Timestamp(year=int(end), month=12, day=31)
+
+# Chart title for the selected years
+def chart_title(year_range, last_year):
+    start, end = (int(y) for y in year_range)
+    if end >= last_year:
+        return f'Central Bank Policy Interest Rates Since {start}'
+    return f'Central Bank Policy Interest Rates, {start} to {end}'
+
+# Slice each trace to the selected years, then to the zoomed window inside them, and cap the points per trace
+# Policy rates are step functions so every rate change is kept first
+# (when zoomed, only the visible window is downsampled so it is shown in more detail)
+def trace_prepare(years, zoom):
+    def prepare(xs, ys):
+        xs, ys = window(xs, ys, years[0].to_datetime64(), years[1].to_datetime64())
+        if zoom is not None:
+            xs, ys = window(xs, ys, zoom[0].to_datetime64(), zoom[1].to_datetime64())
+        return downsample(xs, ys)
+    return prepare
+
+# Dash callback to update line chart based on dropdown selection and date range
+# (zooming re-densifies the visible window)
 @callback(
     Output('interest-rate-line-chart', 'figure'),
-    Input('country-dropdown', 'value')
+    Output('interest-rate-traces', 'data'),
+    Input('country-dropdown', 'value'),
+    Input('interest-rate-date-range', 'value'),
+    Input('interest-rate-line-chart', 'relayoutData'),
+    State('interest-rate-traces', 'data')
 )
-def update_line_chart(selected_countries):
-    if not selected_countries:
+@timed_callback('update_line_chart')
+def update_line_chart(selected_countries, year_range, relayout_data, drawn):
+    if not selected_countries or not year_range:
         # If nothing selected, show empty chart
-        return {}
+        return {}, None
+
+    year_key = [int(year_range[0]), int(year_range[1])]
+    years = year_window(year_key)
+    # A new date range resets the zoom, the relayoutData it leaves behind is ignored until the user zooms again
+    stale_relayout = drawn.get('stale_relayout') if drawn else None
+    if drawn and drawn.get('years') != year_key:
+        stale_relayout = relayout_data
+    zoom = None if relayout_data == stale_relayout else zoom_window(relayout_data)
+    # Relayout events that do not touch the x axis (e.g. a y-only zoom) keep the current window
+    if (zoom is None and drawn and drawn.get('zoom') and drawn.get('years') == year_key
+            and not (relayout_data or {}).get('xaxis.autorange')):
+        zoom = tuple(pd.Timestamp(t) for t in drawn['zoom'])
+    zoom_key = None if zoom is None else [zoom[0].isoformat(), zoom[1].isoformat()]
+    index = get_dataset('policy_rates_index')
+    version = dataset_version('policy_rates_index')
 
-    # Filter full timeseries by selected countries
-    dff = df_full[df_full['Country'].isin(selected_countries)].copy()
+    # Nothing the chart shows has changed (e.g. autosize after the first render, a y-only zoom or a
+    # legend click), so leave the figure in the browser as it is instead of sending it again
+    if (drawn and drawn['version'] == version and drawn.get('years') == year_key and drawn['zoom'] == zoom_key
+            and sorted(drawn['countries']) == sorted(c for c in selected_countries if c in index)):
+        return no_update, no_update
 
-    # Filter date starting from 2000-01-01
-    #dff = dff[dff['Date'] >= pd.to_datetime('2005-01-01')]
+    prepare = trace_prepare(years, zoom)
 
-    # Drop rows with missing values
-    dff = dff.dropna(subset=['Date', 'Interest Rate'])
+    def drawn_state(countries, webgl):
+        return {'countries': countries, 'version': version, 'years': year_key, 'zoom': zoom_key,
+                'stale_relayout': stale_relayout, 'webgl': webgl}
 
-    # Sort by country and date
-    dff = dff.sort_values(['Country', 'Date'])
+    # A dropdown change against the same data, years and zoom only sends the added/removed traces
+    if (drawn and drawn['countries'] and drawn['version'] == version and drawn.get('years') == year_key
+            and drawn['zoom'] == zoom_key and ctx.triggered_id == 'country-dropdown'):
+        colours = country_colours(index)
+        patched, order = patch_traces(
+            drawn['countries'],
+            [c for c in selected_countries if c in index],
+            lambda c: line_trace(index, c, 'Date', 'Interest Rate (%)', colour=colours[c], prepare=prepare,
+                                 webgl=drawn.get('webgl', False))
+        )
+        return patched, drawn_state(order, drawn.get('webgl', False))
 
-    # Plot the line chart
-    fig = px.line(
-        dff,
-        x='Date',
-        y='Interest Rate',
-        color='Country',
-        title='Central Bank Policy Interest Rates Since 2005',
-        labels={'Interest Rate': 'Interest Rate (%)'}
-    )
+    def build():
+        last_year = year_bounds(index)[1]
+        with timed('interest-rates', 'figure_build'):
+            fig = line_figure(
+                index,
+                sorted(selected_countries),
+                title=chart_title(year_key, last_year),
+                x_title='Date',
+                y_title='Interest Rate (%)',
+                prepare=prepare
+            )
+        # Keep the user's zoom when the figure is replaced, a new date range starts a fresh view
+        fig['layout']['uirevision'] = f'interest-rates-{year_key[0]}-{year_key[1]}'
+        if zoom is not None:
+            fig['layout']['xaxis']['range'] = zoom_key
+        return fig
 
-    fig.update_layout(margin=dict(l=40, r=40, t=40, b=40))
-    return fig
+    # Assemble the line chart from the per-country arrays (no filtering or sorting of the full frame)
+    key = figure_cache.make_key('interest-rates', version, selected_countries, (tuple(year_key), zoom))
+    fig = figure_cache.get_or_build(key, build)
+    return fig, drawn_state([c for c in sorted(selected_countries) if c in index], uses_webgl(fig))
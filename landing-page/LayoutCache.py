@@ -0,0 +1,56 @@
+# LayoutCache.py
+# Built tab layouts, kept per tab in serialized form together with the versions of the datasets
+# they were built from. A layout is serialized once with the encoder Dash uses for callback
+# responses and stored as the resulting plain JSON tree, so switching back to a tab skips both
+# building the components and walking them (to_plotly_json) again; the response body is the same.
+# The layout is rebuilt once when one of its datasets is reloaded. Only the latest layout of each
+# tab is kept, so the cache never holds more than one payload per tab.
+
+import json
+import threading
+from plotly.io.json import to_json_plotly
+
+
+class LayoutCache:
+    def __init__(self):
+        self._entries = {}   # tab -> (dataset versions, serialized layout as plain JSON data, its size in bytes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # Return the tab's layout if it was built from these dataset versions, otherwise None
+    def get(self, tab, versions):
+        with self._lock:
+            entry = self._entries.get(tab)
+            if entry is None or entry[0] != versions:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    # Serialize a built layout, store it and return the stored payload
+    def put(self, tab, versions, layout):
+        payload = to_json_plotly(layout)
+        data = json.loads(payload)
+        with self._lock:
+            self._entries[tab] = (versions, data, len(payload))
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry[2] for entry in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+# Cache shared by the dashboard's tab callback
+tab_cache = LayoutCache()
@@ -0,0 +1,176 @@
+# LineCharts.py
+# Per-country pre-indexed series and a line chart builder that assembles figures straight
+# from them, so callbacks do not rescan, copy or re-sort the full dataframe on every change.
+# Dropdown changes can be sent as partial updates that only add or remove the changed traces.
+# Trace data is sent as compact typed arrays (plain lists with plotly.js older than 2.28),
+# and large figures are drawn with WebGL.
+
+import base64
+import logging
+import numpy as np
+import pandas as pd
+from dash import Patch
+
+logger = logging.getLogger(__name__)
+
+# Plotly's default colour sequence (the one px.line uses)
+COLOURS = ['#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A',
+           '#19d3f3', '#FF6692', '#B6E880', '#FF97FF', '#FECB52']
+
+
+# True when df is already ordered by key then x (categorical keys in category order)
+def _is_sorted(df, x, key):
+    keys = df[key]
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.cat.codes
+    keys, xs = keys.to_numpy(), df[x].to_numpy()
+    same = keys[1:] == keys[:-1]
+    return bool((keys[1:] >= keys[:-1]).all() and (xs[1:][same] >= xs[:-1][same]).all())
+
+
+# Build a dict of country -> (x array, y array). The arrays are contiguous slices of one sorted frame.
+# Frames that are already clean and sorted (e.g. the canonical policy rate table) are used as they are.
+def build_country_index(df, x, y, key='Country'):
+    if df[[key, x, y]].isna().any().any():
+        df = df.dropna(subset=[key, x, y])
+    if not _is_sorted(df, x, key):
+        df = df.sort_values([key, x], kind='stable')
+
+    keys = df[key].to_numpy()
+    xs = df[x].to_numpy()
+    ys = df[y].to_numpy()
+    if len(keys) == 0:
+        return {}
+
+    # Start and end offsets of each country's block
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)]
+    return {keys[s]: (xs[s:e], ys[s:e]) for s, e in zip(starts, ends)}
+
+
+# Give each country the same colour whatever else is selected
+def country_colours(index):
+    return {country: COLOURS[i % len(COLOURS)] for i, country in enumerate(sorted(index))}
+
+
+# Above this many points in a figure the traces are drawn with WebGL (scattergl) instead of SVG
+WEBGL_POINT_THRESHOLD = 10000
+
+
+# First plotly.js version that decodes typed arrays. Dash serves the plotly.js bundled with the
+# plotly package, so that is the version the browser gets.
+TYPED_ARRAYS_PLOTLYJS = (2, 28)
+
+
+def _plotlyjs_supports_typed_arrays():
+    try:
+        from plotly.offline import get_plotlyjs_version
+        version = tuple(int(part) for part in get_plotlyjs_version().split('.')[:2])
+    except (ImportError, ValueError):
+        return False
+    if version < TYPED_ARRAYS_PLOTLYJS:
+        logger.warning("plotly.js %s cannot read typed arrays, chart data is sent as plain lists "
+                       "(upgrade plotly to get plotly.js 2.28 or later)", get_plotlyjs_version())
+        return False
+    return True
+
+
+TYPED_ARRAYS = _plotlyjs_supports_typed_arrays()
+
+
+# Encode an array as a Plotly typed array ({dtype, bdata}), decoded by plotly.js straight into a
+# typed array instead of being parsed number by number from JSON (a plain list for older plotly.js)
+def typed_array(values, dtype):
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    if not TYPED_ARRAYS:
+        return values.tolist()
+    return {'dtype': values.dtype.str[1:], 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+
+
+# Encode one series for a trace: dates as epoch milliseconds (the x axis is typed as a date axis),
+# integers (e.g. years) as int32 and values as float32
+def encode_xy(xs, ys):
+    if xs.dtype.kind == 'M':
+        x = typed_array(xs.astype('datetime64[ms]').astype(np.int64), np.float64)
+    elif xs.dtype.kind in 'iu':
+        x = typed_array(xs, np.int32)
+    else:
+        x = typed_array(xs, np.float64)
+    return x, typed_array(ys, np.float32)
+
+
+# The (optionally prepared) arrays of one country
+def trace_arrays(index, country, prepare=None):
+    xs, ys = index[country]
+    if prepare is not None:
+        xs, ys = prepare(xs, ys)
+    return xs, ys
+
+
+# Build one line trace from a country's arrays. Hover values are formatted to 6 significant
+# digits, so float32 values show as 0.1 rather than 0.100000001.
+def encoded_trace(country, xs, ys, x_title, y_title, markers=False, colour=None, webgl=False):
+    x, y = encode_xy(xs, ys)
+    return {
+        'type': 'scattergl' if webgl else 'scatter',
+        'mode': 'lines+markers' if markers else 'lines',
+        'name': country,
+        'legendgroup': country,
+        'x': x,
+        'y': y,
+        'line': {'color': colour or COLOURS[0]},
+        'hovertemplate': f"Country={country}<br>{x_title}=%{{x}}<br>{y_title}=%{{y:.6~g}}<extra></extra>"
+    }
+
+
+# Build one line trace for a country from the index.
+# prepare is an optional function (xs, ys) -> (xs, ys), e.g. to window or downsample the series.
+def line_trace(index, country, x_title, y_title, markers=False, colour=None, prepare=None, webgl=False):
+    xs, ys = trace_arrays(index, country, prepare)
+    return encoded_trace(country, xs, ys, x_title, y_title, markers, colour, webgl)
+
+
+# Build a line chart figure for the selected countries (unknown countries are skipped).
+# Large figures switch to WebGL traces, see WEBGL_POINT_THRESHOLD.
+def line_figure(index, countries, title, x_title, y_title, markers=False, prepare=None):
+    colours = country_colours(index)
+    arrays = [(c, trace_arrays(index, c, prepare)) for c in countries if c in index]
+    webgl = sum(len(xs) for _, (xs, _) in arrays) > WEBGL_POINT_THRESHOLD
+    traces = [encoded_trace(c, xs, ys, x_title, y_title, markers, colours[c], webgl) for c, (xs, ys) in arrays]
+    xaxis = {'title': {'text': x_title}}
+    # Dates are sent as epoch milliseconds, so the axis type cannot be inferred from the values
+    if any(xs.dtype.kind == 'M' for _, (xs, _) in arrays):
+        xaxis['type'] = 'date'
+    return {
+        'data': traces,
+        'layout': {
+            'title': {'text': title},
+            'xaxis': xaxis,
+            'yaxis': {'title': {'text': y_title}},
+            'legend': {'title': {'text': 'Country'}, 'tracegroupgap': 0},
+            'margin': {'l': 40, 'r': 40, 't': 40, 'b': 40}
+        }
+    }
+
+
+# Whether a figure's traces are drawn with WebGL (new traces patched in should match)
+def uses_webgl(figure):
+    return any(trace.get('type') == 'scattergl' for trace in figure.get('data', []))
+
+
+# Work out a partial figure update from the countries currently drawn to the newly selected ones.
+# Removed traces are deleted by index and only the added countries' traces are built and sent.
+# Returns the Patch and the new trace order (to store for the next change).
+def patch_traces(current, selected, make_trace):
+    patched = Patch()
+    selected_set = set(selected)
+    # Delete from the end so the earlier indices stay valid
+    for i in reversed(range(len(current))):
+        if current[i] not in selected_set:
+            del patched['data'][i]
+    kept = [c for c in current if c in selected_set]
+    kept_set = set(kept)
+    added = [c for c in selected if c not in kept_set]
+    for country in added:
+        patched['data'].append(make_trace(country))
+    return patched, kept + added
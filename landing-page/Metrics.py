@@ -0,0 +1,229 @@
+# Metrics.py
+# Stage-level timing for the loaders and callbacks, exposed in the Prometheus text format on
+# /metrics together with dataset sizes, cache counters and process memory.
+
+import bisect
+import functools
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7, 5e7)
+
+
+# Join label pairs, adding the bucket bound when given
+def _labels(labels, bound=None):
+    if bound is not None:
+        labels = labels + [f'le="{bound if isinstance(bound, str) else format(bound, "g")}"']
+    return ",".join(labels)
+
+
+# A Prometheus-style histogram with labels
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}   # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            position = bisect.bisect_left(self.buckets, value)
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for key, (counts, total, count) in items:
+            labels = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{{{_labels(labels, bound)}}} {cumulative}")
+            lines.append(f"{self.name}_bucket{{{_labels(labels, '+Inf')}}} {count}")
+            lines.append(f"{self.name}_sum{{{_labels(labels)}}} {total}")
+            lines.append(f"{self.name}_count{{{_labels(labels)}}} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "dashboard_stage_seconds",
+    "Time spent in each data loading or figure building stage",
+    ["source", "stage"]
+)
+CALLBACK_SECONDS = Histogram(
+    "dashboard_callback_seconds",
+    "Time spent in each Dash callback",
+    ["callback"]
+)
+FIGURE_BYTES = Histogram(
+    "dashboard_figure_payload_bytes",
+    "Size of serialized figures",
+    ["chart"],
+    buckets=BYTES_BUCKETS
+)
+
+
+# Time a block of code as one stage, e.g. with timed('bis', 'csv_parse'): ...
+@contextmanager
+def timed(source, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, source=source, stage=stage)
+
+
+# Decorator timing a Dash callback
+def timed_callback(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                CALLBACK_SECONDS.observe(time.perf_counter() - start, callback=name)
+        return wrapper
+    return decorator
+
+
+_footprints = {}   # (dataset, version) -> (rows, bytes, expanded bytes), so large frames are only measured once per version
+
+
+# Rows, bytes and uncompacted bytes (object strings, float64) of a loaded dataset
+# (a dataframe, or a dict of per-country arrays). Arrays that are views into one of the shared
+# arrays (the columns of the dataset they were built from) add no memory and count as 0 bytes.
+def dataset_footprint(value, shared=()):
+    import numpy as np
+    from CompactFrames import expanded_bytes
+
+    if hasattr(value, "memory_usage"):
+        return len(value), int(value.memory_usage(deep=True).sum()), expanded_bytes(value)
+    if isinstance(value, dict):
+        rows, size, owned = 0, 0, {}
+        for key, arrays in value.items():
+            rows += len(arrays[0])
+            owned[key] = [a for a in arrays if not any(np.may_share_memory(a, s) for s in shared)]
+            size += sum(getattr(a, "nbytes", 0) for a in owned[key])
+        return rows, size, expanded_bytes(owned)
+    size = sys.getsizeof(value)
+    return 0, size, size
+
+
+# Value columns of the datasets a dataset is derived from (label columns are categoricals,
+# whose to_numpy is a copy, so only plain numeric and date columns can be shared)
+def _source_arrays(dataset):
+    import pandas as pd
+    import DataRegistry
+
+    arrays = []
+    for name in dataset.depends_on:
+        source = DataRegistry._datasets[name].value
+        if isinstance(source, pd.DataFrame):
+            arrays += [source[c].to_numpy() for c in source.columns
+                       if not isinstance(source[c].dtype, pd.CategoricalDtype)]
+    return arrays
+
+
+# Before/after memory footprint of every loaded dataset, as a list of dicts
+def memory_report():
+    import DataRegistry
+
+    report = []
+    for name in DataRegistry.registered_datasets():
+        dataset = DataRegistry._datasets[name]
+        if not dataset.ready:
+            continue
+        key = (name, dataset.version)
+        if key not in _footprints:
+            _footprints[key] = dataset_footprint(dataset.value, _source_arrays(dataset))
+        rows, size, expanded = _footprints[key]
+        report.append({"dataset": name, "rows": rows, "bytes": size, "expanded_bytes": expanded})
+    return report
+
+
+# Current resident memory of this process in bytes
+def process_rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # No /proc (macOS, Windows): fall back to the peak RSS where the resource module exists (Unix only)
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _gauge(name, help_text, samples):
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+    return lines
+
+
+# Render every metric in the Prometheus text exposition format
+def render_metrics():
+    import DataRegistry
+    import DataFetch
+    import HttpCaching
+    from FigureCache import figure_cache
+    from LayoutCache import tab_cache
+
+    lines = []
+    for histogram in (STAGE_SECONDS, CALLBACK_SECONDS, FIGURE_BYTES):
+        lines += histogram.render()
+
+    versions = [({"dataset": name}, DataRegistry._datasets[name].version) for name in DataRegistry.registered_datasets()]
+    report = memory_report()
+    lines += _gauge("dashboard_dataset_rows", "Rows in each loaded dataset",
+                    [({"dataset": r["dataset"]}, r["rows"]) for r in report])
+    lines += _gauge("dashboard_dataset_bytes", "Memory used by each loaded dataset",
+                    [({"dataset": r["dataset"]}, r["bytes"]) for r in report])
+    lines += _gauge("dashboard_dataset_expanded_bytes",
+                    "Memory each loaded dataset would use without compaction (object strings, float64)",
+                    [({"dataset": r["dataset"]}, r["expanded_bytes"]) for r in report])
+    lines += _gauge("dashboard_dataset_version", "Number of times each dataset has been loaded", versions)
+
+    http = DataFetch.cache_stats()
+    lines += _gauge("dashboard_http_cache", "HTTP response cache counters",
+                    [({"counter": k}, v) for k, v in http.items()])
+    figures = figure_cache.stats()
+    lines += _gauge("dashboard_figure_cache", "Figure cache counters",
+                    [({"counter": k}, v) for k, v in figures.items()])
+    tabs = tab_cache.stats()
+    lines += _gauge("dashboard_tab_cache", "Tab layout cache counters",
+                    [({"counter": k}, v) for k, v in tabs.items()])
+    responses = HttpCaching.response_cache_stats()
+    lines += _gauge("dashboard_response_cache", "ETag revalidation counters for layout and dependency responses",
+                    [({"counter": k}, v) for k, v in responses.items()])
+    lines += _gauge("dashboard_process_resident_bytes", "Resident memory of this process",
+                    [({}, process_rss_bytes())])
+    return "\n".join(lines) + "\n"
+
+
+# Add a /metrics endpoint to the Flask server behind the Dash app
+def register_metrics_endpoint(server):
+    from flask import Response
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
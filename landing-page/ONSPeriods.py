@@ -0,0 +1,52 @@
+# ONSPeriods.py
+# Vectorised parser for ONS time period labels. ONS CSVs mix annual ("1992"), quarterly
+# ("1992 Q2") and monthly ("1992 MAR") rows in one column, and bulletin charts use "Feb 2000".
+# Each label is classified by frequency and every class is converted to dates in bulk.
+
+import pandas as pd
+
+ANNUAL = "A"
+QUARTERLY = "Q"
+MONTHLY = "M"
+
+MONTH_NUMBERS = {"JAN": 1, "FEB": 2, "MAR": 3, "APR": 4, "MAY": 5, "JUN": 6,
+                 "JUL": 7, "AUG": 8, "SEP": 9, "OCT": 10, "NOV": 11, "DEC": 12}
+
+# "1992", "1992 Q2", "1992 MAR"
+YEAR_FIRST = r'^(?P<year>\d{4})(?:\s+(?:Q(?P<quarter>[1-4])|(?P<month>[A-Z]{3})))?$'
+# "Feb 2000"
+MONTH_FIRST = r'^(?P<month>[A-Z]{3})\s+(?P<year>\d{4})$'
+
+
+# Classify and convert ONS period labels. Returns a frame (same index) with a Frequency column
+# ("A", "Q", "M", or missing when the label is not a period) and a Date column (start of the period).
+def parse_ons_periods(labels):
+    labels = pd.Series(labels).astype("string").str.strip().str.upper()
+
+    parts = labels.str.extract(YEAR_FIRST)
+    month_first = labels.str.extract(MONTH_FIRST)
+    use_month_first = parts["year"].isna() & month_first["year"].notna()
+    parts.loc[use_month_first, ["year", "month"]] = month_first.loc[use_month_first, ["year", "month"]]
+
+    year = pd.to_numeric(parts["year"], errors="coerce")
+    quarter = pd.to_numeric(parts["quarter"], errors="coerce")
+    month = parts["month"].map(MONTH_NUMBERS)
+
+    # Frequency of each label: a month name makes it monthly, a quarter quarterly, a bare year annual
+    frequency = pd.Series(pd.NA, index=labels.index, dtype="string")
+    frequency[year.notna()] = ANNUAL
+    frequency[quarter.notna()] = QUARTERLY
+    frequency[month.notna()] = MONTHLY
+    frequency[parts["month"].notna() & month.isna()] = pd.NA   # unknown month name
+
+    # Month the period starts in: January for years, the quarter's first month for quarters
+    start_month = month.fillna((quarter - 1) * 3 + 1).fillna(1)
+    valid = frequency.notna()
+    dates = pd.Series(pd.NaT, index=labels.index, dtype="datetime64[ns]")
+    dates[valid] = pd.to_datetime(pd.DataFrame({
+        "year": year[valid].astype(int),
+        "month": start_month[valid].astype(int),
+        "day": 1
+    }), errors="coerce")
+
+    return pd.DataFrame({"Frequency": frequency, "Date": dates})
@@ -0,0 +1,109 @@
+# SingleFlight.py
+# Request coalescing for the data loaders. Within a process, concurrent calls with the same
+# arguments wait for the one call already in flight and share its result. Across processes
+# (several server workers), a file lock lets exactly one worker run the loader while the others
+# serve the last stored output if there is one, or wait and then reuse what the leader stored.
+
+import functools
+import logging
+import os
+import threading
+import time
+from FrameStore import cache_dir, call_key
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process coalescing
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+LOCK_DIR = cache_dir("DASHBOARD_LOCK_DIR", "locks")
+
+# Longest a worker waits for another worker's refresh before running the loader itself
+LOCK_TIMEOUT = 300
+LOCK_POLL = 0.25
+
+
+# One in-flight call that other callers can wait on
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def _try_lock(handle):
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+# Run fn while holding the cross-process lock for key. If another process holds it,
+# return stale() when that gives a value, otherwise wait for the lock first.
+def _with_process_lock(key, fn, stale):
+    if fcntl is None:
+        return fn()
+    os.makedirs(LOCK_DIR, exist_ok=True)
+    with open(os.path.join(LOCK_DIR, key + ".lock"), "w") as handle:
+        if not _try_lock(handle):
+            value = stale() if stale else None
+            if value is not None:
+                logger.info("Another worker is refreshing %s, serving stored data", key)
+                return value
+            deadline = time.time() + LOCK_TIMEOUT
+            while not _try_lock(handle):
+                if time.time() >= deadline:
+                    logger.warning("Timed out waiting for another worker to refresh %s", key)
+                    return fn()
+                time.sleep(LOCK_POLL)
+        try:
+            return fn()
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+# Decorator giving a loader single-flight semantics. stale is an optional function taking the
+# loader's arguments and returning its last stored output (or None), served while another
+# process is refreshing.
+def single_flight(name, stale=None):
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper(*args, **kwargs):
+            key = f"{name}-{call_key(args, kwargs)}"
+
+            with _calls_lock:
+                call = _calls.get(key)
+                leader = call is None
+                if leader:
+                    call = _calls[key] = _Call()
+
+            # Followers in this process wait for the leader's result
+            if not leader:
+                call.done.wait()
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+            try:
+                call.result = _with_process_lock(
+                    key,
+                    lambda: loader(*args, **kwargs),
+                    (lambda: stale(*args, **kwargs)) if stale else None
+                )
+                return call.result
+            except Exception as exc:
+                call.error = exc
+                raise
+            finally:
+                with _calls_lock:
+                    del _calls[key]
+                call.done.set()
+        return wrapper
+    return decorator
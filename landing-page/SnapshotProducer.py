@@ -0,0 +1,46 @@
+# SnapshotProducer.py
+# Loads every shared dataset once and publishes it as an Arrow snapshot for the server workers,
+# then keeps refreshing on the usual per-source TTLs. Run it next to the workers, e.g.
+#
+#   DASHBOARD_SNAPSHOT_MODE=produce python SnapshotProducer.py &
+#   DASHBOARD_SNAPSHOT_MODE=consume gunicorn -w 4 "Welcome:app.server"
+#
+# Workers pick up each new snapshot version without restarting.
+
+import logging
+import os
+import time
+
+os.environ["DASHBOARD_SNAPSHOT_MODE"] = "produce"
+
+import DataRegistry  # noqa: E402
+# Importing the pages registers their datasets
+import InterestRates  # noqa: E402,F401
+import GDP  # noqa: E402,F401
+import EmpRates  # noqa: E402,F401
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    shared = [name for name in DataRegistry.registered_datasets() if DataRegistry._datasets[name].snapshot]
+    for name in shared:
+        try:
+            DataRegistry.get_dataset(name)
+        except Exception:
+            logging.exception("Could not load dataset %s, will retry on the next refresh", name)
+
+    while True:
+        time.sleep(DataRegistry.SCHEDULER_INTERVAL)
+        for name in shared:
+            dataset = DataRegistry._datasets[name]
+            if not dataset.ready:
+                try:
+                    DataRegistry.get_dataset(name)
+                except Exception:
+                    logging.exception("Could not load dataset %s", name)
+            elif DataRegistry.dataset_expired(name):
+                DataRegistry.refresh_dataset(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Snapshots.py
+# Dataset snapshots shared by several server workers. One loader process writes each dataset
+# as an Arrow IPC file; workers memory-map the newest file read-only, so the data is fetched
+# once and numeric columns are shared through the OS page cache instead of copied per worker.
+#
+# DASHBOARD_SNAPSHOT_MODE: "off" (default, every process loads its own data),
+#                          "produce" (write a snapshot after each load, see SnapshotProducer.py),
+#                          "consume" (read snapshots instead of calling the upstream sources)
+
+import os
+import time
+from FrameStore import cache_dir, temp_path, write_atomic
+
+SNAPSHOT_DIR = cache_dir("DASHBOARD_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_MODE = os.environ.get("DASHBOARD_SNAPSHOT_MODE", "off")
+
+# Older snapshot files kept on disk for workers that still have them mapped
+KEEP_VERSIONS = 3
+
+# How long a consumer waits for the producer's first snapshot before loading the data itself
+FIRST_SNAPSHOT_WAIT = 120
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as exc:
+        raise ImportError("Dataset snapshots need pyarrow (pip install pyarrow)") from exc
+    return pyarrow
+
+
+def _dataset_dir(name):
+    return os.path.join(SNAPSHOT_DIR, name)
+
+
+# Version (file name) of the newest snapshot of a dataset, None if there is none yet
+def current_snapshot_version(name):
+    try:
+        with open(os.path.join(_dataset_dir(name), "CURRENT")) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+# Write a dataframe as a new snapshot version and point CURRENT at it
+def write_snapshot(name, df):
+    pa = _require_pyarrow()
+    folder = _dataset_dir(name)
+    os.makedirs(folder, exist_ok=True)
+
+    # Dictionary-encode text columns so workers map small integer codes instead of copying strings
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype == object:
+            df[column] = df[column].astype("category")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    version = f"{time.time_ns()}.arrow"
+    tmp_path = temp_path(os.path.join(folder, version))
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, os.path.join(folder, version))
+
+    # Swap CURRENT atomically so readers always see a complete file
+    write_atomic(os.path.join(folder, "CURRENT"), version)
+
+    # Remove old versions (workers that still map them keep access until they swap)
+    versions = sorted(v for v in os.listdir(folder) if v.endswith(".arrow"))
+    for old in versions[:-KEEP_VERSIONS]:
+        os.remove(os.path.join(folder, old))
+    return version
+
+
+# Memory-map the newest snapshot read-only. Returns (version, dataframe) or (None, None).
+def read_snapshot(name):
+    pa = _require_pyarrow()
+    version = current_snapshot_version(name)
+    if version is None:
+        return None, None
+    source = pa.memory_map(os.path.join(_dataset_dir(name), version), "r")
+    table = pa.ipc.open_file(source).read_all()
+    # split_blocks avoids consolidating columns into new 2D blocks, so numeric columns stay backed by the map
+    return version, table.to_pandas(split_blocks=True)
+
+
+# Wait for the producer to publish a first snapshot, (None, None) after the timeout
+def wait_for_snapshot(name, timeout=FIRST_SNAPSHOT_WAIT, poll=1.0):
+    deadline = time.time() + timeout
+    while True:
+        version, df = read_snapshot(name)
+        if version is not None or time.time() >= deadline:
+            return version, df
+        time.sleep(poll)
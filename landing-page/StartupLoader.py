@@ -0,0 +1,181 @@
+# StartupLoader.py
+# Concurrent startup loading of every registered dataset. Base datasets (fetched from BIS, ONS
+# and the World Bank) are loaded in parallel on a thread pool, so a cold start takes about as
+# long as the slowest source rather than the sum of all of them. Each source has its own
+# concurrency limit, transient failures (network errors, timeouts) are retried with exponential
+# backoff, and derived datasets
+# are built as soon as the datasets they depend on are ready. A per-source timing report is
+# logged at the end (and the load times are recorded under the "startup" stage on /metrics).
+
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import requests
+import DataRegistry
+from Metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Threads shared by all sources
+MAX_WORKERS = 8
+
+# Datasets loaded at the same time per source (each loader may also fan out its own requests)
+SOURCE_CONCURRENCY = {
+    "bis": 1,
+    "ons": 2,
+    "world_bank": 2
+}
+DEFAULT_SOURCE_CONCURRENCY = 2
+
+# Retries after a failed load, waiting BACKOFF_SECONDS, then twice as long, and so on
+RETRIES = 2
+BACKOFF_SECONDS = 2.0
+
+# Errors worth retrying, anything else (e.g. a parsing bug) fails the dataset straight away
+TRANSIENT_ERRORS = (requests.RequestException, OSError, TimeoutError, FutureTimeoutError)
+
+# How often a backoff wait checks whether the process is exiting
+SHUTDOWN_POLL_SECONDS = 0.1
+
+# Give up waiting for the remaining datasets after this long (they keep loading in the background,
+# and the HTTP requests themselves time out through DataFetch.DEFAULT_TIMEOUT)
+STARTUP_TIMEOUT = 300
+
+
+# A dataset's source, derived datasets take the source of the first dataset they depend on
+def dataset_source(name):
+    dataset = DataRegistry._datasets[name]
+    if dataset.source is not None:
+        return dataset.source
+    if dataset.depends_on:
+        return dataset_source(dataset.depends_on[0])
+    return "local"
+
+
+# True once the main thread has finished and the interpreter is exiting (no new work can be scheduled)
+def _shutting_down():
+    return sys.is_finalizing() or not threading.main_thread().is_alive()
+
+
+# Sleep for a retry backoff, returning False straight away if the process starts exiting
+def _backoff_wait(delay):
+    deadline = time.monotonic() + delay
+    while time.monotonic() < deadline:
+        if _shutting_down():
+            return False
+        time.sleep(min(SHUTDOWN_POLL_SECONDS, deadline - time.monotonic()))
+    return not _shutting_down()
+
+
+# Load one dataset under its source's concurrency limit, retrying transient errors with backoff.
+# Returns the timing record for the report: its own load time and when it finished after startup began.
+def _load_with_retries(name, limits, retries, backoff, startup_start):
+    source = dataset_source(name)
+    record = {"dataset": name, "source": source, "attempts": 0, "seconds": 0.0, "finished": 0.0, "status": "ok"}
+    start = time.perf_counter()
+    for attempt in range(retries + 1):
+        record["attempts"] += 1
+        try:
+            with limits[source]:
+                DataRegistry.get_dataset(name)
+            break
+        except Exception as exc:
+            if isinstance(exc, TRANSIENT_ERRORS) and attempt < retries and not _shutting_down():
+                delay = backoff * 2 ** attempt
+                logger.warning("Startup load of dataset %s failed (%s), retrying in %.0fs", name, exc, delay)
+                if _backoff_wait(delay):
+                    continue
+            record["status"] = f"failed: {exc}"
+            logger.exception("Startup load failed for dataset %s after %d attempts", name, attempt + 1)
+            break
+    record["seconds"] = time.perf_counter() - start
+    record["finished"] = time.perf_counter() - startup_start
+    STAGE_SECONDS.observe(record["seconds"], source=source, stage="startup")
+    return record
+
+
+# Load the given datasets (default: all registered) and the datasets they depend on concurrently.
+# Returns {"seconds": wall time, "datasets": [timing record per dataset]}.
+def load_all(names=None, max_workers=MAX_WORKERS, source_concurrency=None, retries=RETRIES,
+             backoff=BACKOFF_SECONDS, timeout=STARTUP_TIMEOUT):
+    datasets = DataRegistry._datasets
+    pending = set(names or DataRegistry.registered_datasets())
+    # Include the dependencies of the requested datasets
+    stack = list(pending)
+    while stack:
+        for dependency in datasets[stack.pop()].depends_on:
+            if dependency not in pending:
+                pending.add(dependency)
+                stack.append(dependency)
+
+    concurrency = dict(SOURCE_CONCURRENCY, **(source_concurrency or {}))
+    sources = {dataset_source(name) for name in pending}
+    limits = {source: threading.BoundedSemaphore(concurrency.get(source, DEFAULT_SOURCE_CONCURRENCY))
+              for source in sources}
+
+    start = time.perf_counter()
+    deadline = start + timeout
+    records, done, failed = [], set(), set()
+    running = {}
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+    try:
+        while pending or running:
+            # Start every dataset whose dependencies are loaded; skip those whose dependencies failed
+            for name in sorted(pending):
+                depends_on = datasets[name].depends_on
+                if any(d in failed for d in depends_on):
+                    pending.discard(name)
+                    failed.add(name)
+                    records.append({"dataset": name, "source": dataset_source(name), "attempts": 0, "seconds": 0.0,
+                                    "finished": time.perf_counter() - start, "status": "skipped: dependency failed"})
+                elif all(d in done for d in depends_on):
+                    pending.discard(name)
+                    running[pool.submit(_load_with_retries, name, limits, retries, backoff, start)] = name
+
+            remaining = deadline - time.perf_counter()
+            if not running or remaining <= 0:
+                break
+            finished, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                record = future.result()
+                records.append(record)
+                (done if record["status"] == "ok" else failed).add(name)
+
+        # Out of time: report what is still loading and leave it to finish in the background
+        for name in list(running.values()) + sorted(pending):
+            records.append({"dataset": name, "source": dataset_source(name), "attempts": 0, "seconds": 0.0,
+                            "finished": time.perf_counter() - start, "status": "timed out"})
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    report = {"seconds": time.perf_counter() - start, "datasets": records}
+    log_report(report)
+    return report
+
+
+# Per source: datasets loaded, time spent loading them, when the last one finished, and failures
+def source_summary(report):
+    summary = {}
+    for record in report["datasets"]:
+        source = summary.setdefault(record["source"], {"datasets": 0, "seconds": 0.0, "finished": 0.0, "failed": 0})
+        source["datasets"] += 1
+        source["seconds"] += record["seconds"]
+        source["finished"] = max(source["finished"], record["finished"])
+        source["failed"] += record["status"] != "ok"
+    return summary
+
+
+def log_report(report):
+    lines = [f"Startup load finished in {report['seconds']:.2f}s"]
+    for source, summary in sorted(source_summary(report).items()):
+        failed = f"  {summary['failed']} failed" if summary["failed"] else ""
+        lines.append(f"  {source:<12}{summary['datasets']:>3} datasets {summary['seconds']:>8.2f}s loading,"
+                     f" done at {summary['finished']:.2f}s{failed}")
+    for record in report["datasets"]:
+        if record["status"] != "ok":
+            lines.append(f"  {record['dataset']}: {record['status']}")
+    logger.info("\n".join(lines))
@@ -0,0 +1,92 @@
+# WarmStart.py
+# Persist each loader's final, ready-to-plot output so a restart loads it in milliseconds.
+# A stored frame is reused while its schema version and the upstream source fingerprint
+# (ETag / Last-Modified, or a hash of the body) still match. If an upstream source cannot
+# be reached, or DASHBOARD_OFFLINE=1 is set, the last good frame is served instead.
+
+import functools
+import hashlib
+import logging
+import os
+import requests
+from DataFetch import fetch
+from FrameStore import save_frame, load_frame, frame_exists, cache_dir, call_key, read_json, write_json
+from Metrics import timed
+
+logger = logging.getLogger(__name__)
+
+PROCESSED_DIR = cache_dir("DASHBOARD_PROCESSED_DIR", "processed")
+OFFLINE = os.environ.get("DASHBOARD_OFFLINE", "0") == "1"
+
+
+def _base(name, args, kwargs):
+    # Different arguments (e.g. year ranges) are stored separately
+    return os.path.join(PROCESSED_DIR, f"{name}-{call_key(args, kwargs)}")
+
+
+def _read_meta(base):
+    return read_json(base + ".json")
+
+
+def _write_meta(base, meta):
+    write_json(base + ".json", meta)
+
+
+# Fingerprint of the upstream data: one conditional GET per source (usually a 304).
+# The response stays fresh in the HTTP cache, so the loader's own request that follows is free.
+def source_fingerprint(sources):
+    digest = hashlib.sha256()
+    for url, params in sources:
+        digest.update(fetch(url, params=params).fingerprint().encode("utf-8"))
+    return digest.hexdigest()
+
+
+# Function returning the last stored output of a loader for given arguments (None if there is none),
+# whatever its fingerprint. Used to serve stale data while another worker refreshes.
+def stored_output(name, schema_version):
+    def load(*args, **kwargs):
+        base = _base(name, args, kwargs)
+        meta = _read_meta(base)
+        if meta is None or meta.get("schema") != schema_version or not frame_exists(base):
+            return None
+        return load_frame(base)
+    return load
+
+
+# Decorator for a loader. sources is a function taking the loader's arguments and returning the
+# (url, params) pairs its output depends on; bump schema_version whenever the output changes shape.
+def warm_start(name, schema_version, sources):
+    def decorator(loader):
+        @functools.wraps(loader)
+        def wrapper(*args, **kwargs):
+            base = _base(name, args, kwargs)
+            meta = _read_meta(base)
+            stored = meta is not None and meta.get("schema") == schema_version and frame_exists(base)
+
+            def load_stored():
+                with timed(name, "warm_start_load"):
+                    return load_frame(base)
+
+            if OFFLINE:
+                if stored:
+                    return load_stored()
+                raise RuntimeError(f"Offline mode and no stored data for {name}")
+
+            try:
+                fingerprint = source_fingerprint(sources(*args, **kwargs))
+                if stored and meta.get("fingerprint") == fingerprint:
+                    return load_stored()
+                df = loader(*args, **kwargs)
+            except requests.RequestException:
+                if not stored:
+                    raise
+                # Source unreachable: serve the last good snapshot
+                logger.warning("Source for %s unreachable, serving data stored at fingerprint %s",
+                               name, meta.get("fingerprint"))
+                return load_stored()
+
+            save_frame(base, df)
+            _write_meta(base, {"schema": schema_version, "fingerprint": fingerprint})
+            return df
+        return wrapper
+    return decorator
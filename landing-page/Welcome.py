@@ -1,20 +1,33 @@
 # Import Dash framework
 import dash
+import logging
+import os
 # Import required Dash components
 from dash import html, dcc, Input, Output
 # Import the layout for interest rates and GDP
-from InterestRates import interest_rates_layout
-from GDP import layout as gdp_layout, register_callbacks  # import callback registrar for GDP
-from EmpRates import unemployment_kpi_component  # Import your KPI component
+from InterestRates import interest_rates_layout, LAYOUT_DATASETS as INTEREST_RATES_DATASETS
+from GDP import layout as gdp_layout, register_callbacks, LAYOUT_DATASETS as GDP_DATASETS  # import callback registrar for GDP
+from EmpRates import unemployment_kpi_component, LAYOUT_DATASETS as EMPLOYMENT_DATASETS  # Import your KPI component
+from DataRegistry import start_warmup, start_refresh_scheduler, dataset_version  # Loads and refreshes the datasets in the background
+from LayoutCache import tab_cache  # Serialized tab layouts, reused until their data changes
+from Metrics import register_metrics_endpoint, timed_callback  # Timings exposed on /metrics
+from HttpCaching import compression_options, register_http_caching  # Compressed, revalidatable responses
 
 # Initialise the Dash App
-app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# (responses are gzip/brotli compressed by flask-compress when installed, gzipped by HttpCaching otherwise)
+app = dash.Dash(__name__, suppress_callback_exceptions=True, **compression_options())
 # Create the title of the dashboard
 app.title = "UK Economic Growth Drivers Dashboard"
 
 # Register callbacks from GDP module (and others if needed)
 register_callbacks(app)
 
+# Expose loader/callback timings, dataset sizes and memory on /metrics of the Flask server
+register_metrics_endpoint(app.server)
+
+# ETag/Cache-Control on the layout and dependency responses, so unchanged ones are answered with a 304
+register_http_caching(app.server)
+
 # Define the layout of the dashboard
 app.layout = html.Div(
     style={
@@ -43,9 +56,13 @@ app.layout = html.Div(
             ]
         ),
         # Placeholder for content based on selected tab
-        html.Div(
-            id='tab-content',
-            style={'marginTop': '30px'}  # Add spacing above the content
+        # (shows a loading spinner while a tab's data is still being fetched)
+        dcc.Loading(
+            type='circle',
+            children=html.Div(
+                id='tab-content',
+                style={'marginTop': '30px'}  # Add spacing above the content
+            )
         )
     ]
 )
@@ -55,115 +72,154 @@ app.layout = html.Div(
     Output('tab-content', 'children'),
     Input('tabs', 'value')
 )
+@timed_callback('render_tab_content')
 def render_tab_content(tab):
-    # Content for the Welcome tab
-    if tab == 'welcome':
+    try:
+        return build_tab_content(tab)
+    except Exception:
+        # Keep the dashboard usable if a data source cannot be reached
+        logging.exception("Failed to build content for tab %s", tab)
         return html.Div([
-            # Main content: two columns
+            html.H3("This data is currently unavailable", style={'color': '#003366'}),
+            html.P("The data source could not be reached. Please try again shortly.")
+        ])
+
+# Content for the Welcome tab (static, built once at import)
+WELCOME_CONTENT = html.Div([
+    # Main content: two columns
+    html.Div(
+        style={'display': 'flex', 'justifyContent': 'space-between'},
+        children=[
+            # Left column
             html.Div(
-                style={'display': 'flex', 'justifyContent': 'space-between'},
+                style={'width': '48%', 'paddingRight': '20px'},
                 children=[
-                    # Left column
-                    html.Div(
-                        style={'width': '48%', 'paddingRight': '20px'},
-                        children=[
-                            html.H2("Dashboard Purpose", style={'color': '#003366'}),
-                            html.P(
-                                "This dashboard provides a simplified consolidated view of key economic indicators "
-                                "that influence the UK's economic growth. It contains data on:"
-                            ),
-                            html.Ul([
-                                html.Li("📊 Interest Rate Data – UK & Global"),
-                                html.Li("🌍 Gross Domestic Product (GDP) – UK & Global"),
-                                html.Li("💼 Wages Data – UK only"),
-                                html.Li("🛒 Cost of Living Data – UK only"),
-                            ]),
-                            html.H3("Commentary Preference", style={'color': '#003366'}),
-                            dcc.RadioItems(
-                                id='commentary-type',
-                                options=[
-                                    {'label': 'Simple', 'value': 'simple'},
-                                    {'label': 'Complex', 'value': 'complex'}
-                                ],
-                                value='simple',
-                                labelStyle={'display': 'inline-block', 'marginRight': '20px'}
-                            )
-                        ]
+                    html.H2("Dashboard Purpose", style={'color': '#003366'}),
+                    html.P(
+                        "This dashboard provides a simplified consolidated view of key economic indicators "
+                        "that influence the UK's economic growth. It contains data on:"
                     ),
-                    # Right column
-                    html.Div(
-                        style={'width': '48%'},
-                        children=[
-                            html.H2("How to Use the Dashboard", style={'color': '#003366'}),
-                            html.P([
-                                html.Em([
-                                    html.Strong("Get started by clicking on the tabs above to explore the data!")
-                                ])
-                            ]),
-                            html.P("Each tab contains useful charts and short explainers to help you understand what drives UK economic growth."),
-                            html.H3("Hints and Tips", style={'color': '#003366'}),
-                            html.Ul([
-                                html.Li("Hover over charts for more detail."),
-                                html.Li("Use filters to refine what data is displayed."),
-                                html.Li("Check data sources at the bottom of each section.")
-                            ])
-                        ]
+                    html.Ul([
+                        html.Li("📊 Interest Rate Data – UK & Global"),
+                        html.Li("🌍 Gross Domestic Product (GDP) – UK & Global"),
+                        html.Li("💼 Wages Data – UK only"),
+                        html.Li("🛒 Cost of Living Data – UK only"),
+                    ]),
+                    html.H3("Commentary Preference", style={'color': '#003366'}),
+                    dcc.RadioItems(
+                        id='commentary-type',
+                        options=[
+                            {'label': 'Simple', 'value': 'simple'},
+                            {'label': 'Complex', 'value': 'complex'}
+                        ],
+                        value='simple',
+                        labelStyle={'display': 'inline-block', 'marginRight': '20px'}
                     )
                 ]
             ),
-            # Bottom warning box
+            # Right column
             html.Div(
-                style={
-                    'marginTop': '40px',
-                    'padding': '20px',
-                    'backgroundColor': '#fff3cd',
-                    'color': '#856404',
-                    'border': '1px solid #ffeeba',
-                    'borderRadius': '5px',
-                    'fontWeight': 'bold',
-                    'display': 'flex',
-                    'alignItems': 'center',
-                    'justifyContent': 'center'
-                },
+                style={'width': '48%'},
                 children=[
-                    html.Span("⚠️", style={'fontSize': '24px', 'marginRight': '10px'}),
-                    html.Span("The information presented in this dashboard is for informational and educational purposes only. "
-                              "It should not be interpreted as financial advice or used for investment decisions. "
-                              "Always consult a qualified financial advisor before making financial choices.")
+                    html.H2("How to Use the Dashboard", style={'color': '#003366'}),
+                    html.P([
+                        html.Em([
+                            html.Strong("Get started by clicking on the tabs above to explore the data!")
+                        ])
+                    ]),
+                    html.P("Each tab contains useful charts and short explainers to help you understand what drives UK economic growth."),
+                    html.H3("Hints and Tips", style={'color': '#003366'}),
+                    html.Ul([
+                        html.Li("Hover over charts for more detail."),
+                        html.Li("Use filters to refine what data is displayed."),
+                        html.Li("Check data sources at the bottom of each section.")
+                    ])
                 ]
             )
-        ])
+        ]
+    ),
+    # Bottom warning box
+    html.Div(
+        style={
+            'marginTop': '40px',
+            'padding': '20px',
+            'backgroundColor': '#fff3cd',
+            'color': '#856404',
+            'border': '1px solid #ffeeba',
+            'borderRadius': '5px',
+            'fontWeight': 'bold',
+            'display': 'flex',
+            'alignItems': 'center',
+            'justifyContent': 'center'
+        },
+        children=[
+            html.Span("⚠️", style={'fontSize': '24px', 'marginRight': '10px'}),
+            html.Span("The information presented in this dashboard is for informational and educational purposes only. "
+                      "It should not be interpreted as financial advice or used for investment decisions. "
+                      "Always consult a qualified financial advisor before making financial choices.")
+        ]
+    )
+])
 
-    # Content for the Interest Rates tab
-    elif tab == 'interest-rates':
-        return interest_rates_layout  # Imported from InterestRates.py
+# Content for Cost of Living tab (static placeholder)
+COST_OF_LIVING_CONTENT = html.Div([
+    html.H2("Cost of Living"),
+    html.P("Content for Cost of Living tab goes here.")
+])
 
-    # Content for Employment & Wages tab — now with unemployment KPI on left column
-    elif tab == 'employment-wages':
-        return html.Div(
-            style={'display': 'flex', 'height': '500px'},  # horizontal flex container with fixed height
-            children=[
-                # Left column: Unemployment KPI circle
-                unemployment_kpi_component,
-
-                # Right column: Placeholder or extra info
-                html.Div(
-                    style={'width': '48%', 'paddingLeft': '20px'},
-                    
-                )
-            ]
-        )
+# Content for Employment & Wages tab — unemployment KPI on left column
+def employment_wages_layout():
+    return html.Div(
+        style={'display': 'flex', 'height': '500px'},  # horizontal flex container with fixed height
+        children=[
+            # Left column: Unemployment KPI circle
+            unemployment_kpi_component(),
 
-    # Content for Cost of Living tab
+            # Right column: Placeholder or extra info
+            html.Div(
+                style={'width': '48%', 'paddingLeft': '20px'},
+                
+            )
+        ]
+    )
+
+# Builders of the data tabs and the datasets each is built from
+TAB_LAYOUTS = {
+    'interest-rates': (interest_rates_layout, INTEREST_RATES_DATASETS),  # Imported from InterestRates.py
+    'employment-wages': (employment_wages_layout, EMPLOYMENT_DATASETS),
+    'gdp': (gdp_layout, GDP_DATASETS),
+}
+
+# Versions of the datasets a tab is built from (0 for a dataset not loaded yet)
+def tab_versions(tab):
+    return tuple(dataset_version(name) for name in TAB_LAYOUTS[tab][1])
+
+# A data tab's layout, rebuilt only when one of its datasets has a new version.
+# Later switches to the tab return the serialized layout instead of rebuilding and re-walking the components.
+def cached_tab_layout(tab):
+    build = TAB_LAYOUTS[tab][0]
+    layout = tab_cache.get(tab, tab_versions(tab))
+    if layout is None:
+        # Building may have loaded the data for the first time, so store it under the versions it was built from
+        layout = tab_cache.put(tab, tab_versions(tab), build())
+    return layout
+
+def build_tab_content(tab):
+    if tab == 'welcome':
+        return WELCOME_CONTENT
     elif tab == 'cost-of-living':
-        return html.Div([
-            html.H2("Cost of Living"),
-            html.P("Content for Cost of Living tab goes here.")
-        ])
+        return COST_OF_LIVING_CONTENT
+    elif tab in TAB_LAYOUTS:
+        return cached_tab_layout(tab)
+
+# Load the datasets in the background so the first visit to each tab is quick, the BIS, ONS
+# and World Bank sources are fetched concurrently (see StartupLoader.py)
+# (set DASHBOARD_WARMUP=0 to only load data when a tab is first opened)
+if os.environ.get('DASHBOARD_WARMUP', '1') != '0':
+    start_warmup()
 
-    # Content for Gross Domestic Product tab
-    elif tab == 'gdp':
-        return gdp_layout
+# Refresh datasets in the background when new BIS/ONS/World Bank releases are due
+start_refresh_scheduler()
 
 # Start the Dash app server
 if __name__ == '__main__':
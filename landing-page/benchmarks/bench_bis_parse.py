@@ -0,0 +1,100 @@
+# Benchmark the BIS policy rate parsers: time and peak memory (RSS) of each parsing mode
+#
+# Usage (from the landing-page folder):
+#   python benchmarks/bench_bis_parse.py                 # downloads the BIS ZIP once, then benchmarks it
+#   python benchmarks/bench_bis_parse.py --zip file.zip  # benchmarks an already downloaded ZIP
+
+import argparse
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+# Make the dashboard modules importable when run from the benchmarks folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = ["legacy", "streaming", "streaming-pyarrow"]
+
+
+# The original pipeline: bytes -> BytesIO -> read().decode() -> StringIO -> read_csv(all columns)
+def parse_legacy(zip_path):
+    import pandas as pd
+    with open(zip_path, "rb") as raw:
+        content_bytes = raw.read()
+    with zipfile.ZipFile(io.BytesIO(content_bytes)) as z:
+        csv_name = [name for name in z.namelist() if name.endswith(".csv")][0]
+        with z.open(csv_name) as f:
+            content = f.read().decode('utf-8', errors='replace')
+            return pd.read_csv(io.StringIO(content), low_memory=False)
+
+
+def run_mode(mode, zip_path):
+    from IRDataLoad import read_policy_rates_zip
+    start = time.perf_counter()
+    if mode == "legacy":
+        df = parse_legacy(zip_path)
+    elif mode == "streaming":
+        df = read_policy_rates_zip(zip_path, engine="c")
+    else:
+        df = read_policy_rates_zip(zip_path, engine="pyarrow")
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak *= 1024
+    return {
+        "mode": mode,
+        "rows": len(df),
+        "columns": len(df.columns),
+        "parse_seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak / 1024 / 1024, 1),
+        "frame_mb": round(df.memory_usage(deep=True).sum() / 1024 / 1024, 1)
+    }
+
+
+def download_zip():
+    from IRDataLoad import BIS_POLICY_RATES_URL
+    import requests
+    response = requests.get(BIS_POLICY_RATES_URL, stream=True)
+    response.raise_for_status()
+    handle = tempfile.NamedTemporaryFile(suffix=".zip", delete=False)
+    with handle:
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            handle.write(chunk)
+    return handle.name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--zip", help="Path to a downloaded WS_CBPOL_csv_flat.zip")
+    parser.add_argument("--mode", choices=MODES, help="Run a single mode (used internally)")
+    args = parser.parse_args()
+
+    # Child process: run one mode and print the result as JSON
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.zip)))
+        return
+
+    zip_path = args.zip or download_zip()
+
+    # Each mode runs in its own process so peak RSS is not polluted by the other modes
+    print(f"{'mode':<20}{'rows':>10}{'cols':>6}{'parse s':>10}{'peak RSS MB':>14}{'frame MB':>10}")
+    for mode in MODES:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode, "--zip", zip_path],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"{mode:<20} failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(result.stdout)
+        print(f"{r['mode']:<20}{r['rows']:>10}{r['columns']:>6}{r['parse_seconds']:>10}{r['peak_rss_mb']:>14}{r['frame_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# Measure time-to-first-request of the dashboard: importing Welcome (what a WSGI worker does)
+# and serving the first page and layout requests through the Flask test client.
+#
+# Usage (from the landing-page folder):
+#   python benchmarks/bench_startup.py            # against the real sources
+#   python benchmarks/bench_startup.py --local    # offline, against the stand-ins in local_sources.py
+#   python benchmarks/bench_startup.py --local --baseline e51e6c2   # also measure an older revision
+#
+# Each run uses a fresh process. --baseline checks the given revision out into a temporary git
+# worktree and measures it the same way, so the "before" and "after" numbers are saved side by
+# side in benchmarks/results/startup-<time>-<revision>.json.
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+LANDING_PAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCHMARKS, "results")
+
+# Prepended to the child when --local is given (the caches go to a fresh temporary folder per run)
+LOCAL_SOURCES = """
+import sys
+sys.path.insert(0, %r)
+import local_sources
+local_sources.install(1)
+""" % BENCHMARKS
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import Welcome
+imported = time.perf_counter()
+client = Welcome.app.server.test_client()
+client.get('/')
+first_page = time.perf_counter()
+client.get('/_dash-layout')
+first_layout = time.perf_counter()
+print(json.dumps({
+    'import_seconds': round(imported - start, 3),
+    'first_page_seconds': round(first_page - start, 3),
+    'first_layout_seconds': round(first_layout - start, 3)
+}))
+"""
+
+
+def measure(warmup, local=False, landing_page=LANDING_PAGE):
+    env = dict(os.environ, DASHBOARD_WARMUP='1' if warmup else '0')
+    code = CHILD
+    if local:
+        cache = tempfile.mkdtemp(prefix="dashboard-startup-")
+        env.update({"DASHBOARD_CACHE_DIR": os.path.join(cache, "http"),
+                    "DASHBOARD_BIS_HISTORY_DIR": os.path.join(cache, "bis_history"),
+                    "DASHBOARD_PROCESSED_DIR": os.path.join(cache, "processed"),
+                    "DASHBOARD_LOCK_DIR": os.path.join(cache, "locks")})
+        code = LOCAL_SOURCES + CHILD
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=landing_page, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_seconds"] = round(time.perf_counter() - start, 3)
+    return timings
+
+
+def git_revision(revision="HEAD"):
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", revision], cwd=LANDING_PAGE,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+# Time to first request with and without the background warmup (older revisions ignore DASHBOARD_WARMUP)
+def measure_tree(local, landing_page=LANDING_PAGE):
+    runs = {}
+    for warmup in (False, True):
+        timings = measure(warmup, local, landing_page)
+        label = "background warmup" if warmup else "lazy (no warmup)"
+        runs[label] = timings
+        print(f"  {label:<20} import {timings['import_seconds']}s, first page {timings['first_page_seconds']}s, "
+              f"first layout {timings['first_layout_seconds']}s, process {timings['process_seconds']}s")
+    return runs
+
+
+# Measure an older revision from a temporary worktree
+def measure_revision(revision, local):
+    worktree = tempfile.mkdtemp(prefix="dashboard-baseline-")
+    subprocess.run(["git", "worktree", "add", "--detach", worktree, revision], cwd=LANDING_PAGE,
+                   check=True, capture_output=True)
+    try:
+        return measure_tree(local, os.path.join(worktree, os.path.basename(LANDING_PAGE)))
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=LANDING_PAGE, capture_output=True)
+        shutil.rmtree(worktree, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the dashboard's time to first request")
+    parser.add_argument("--local", action="store_true", help="Use the offline stand-ins for BIS, ONS and the World Bank")
+    parser.add_argument("--baseline", help="Also measure this git revision (the \"before\" numbers)")
+    args = parser.parse_args()
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "local_sources": args.local,
+        "startup": {}
+    }
+    if args.baseline:
+        results["baseline_revision"] = git_revision(args.baseline)
+        print(f"Baseline {results['baseline_revision']}:")
+        results["baseline"] = measure_revision(args.baseline, args.local)
+    print(f"Current tree {results['revision']}:")
+    results["startup"] = measure_tree(args.local)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"startup-{time.strftime('%Y%m%d-%H%M%S')}-{results['revision'] or 'local'}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {path}")
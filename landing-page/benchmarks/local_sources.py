@@ -0,0 +1,202 @@
+# Offline stand-ins for the BIS, ONS and World Bank endpoints used by the data loaders.
+#
+# install(scale) mounts a requests transport adapter on the shared DataFetch session, so the
+# unmodified loaders read synthetic payloads instead of going to the internet. Plain requests.get
+# calls (the loaders before DataFetch.py existed, e.g. the baseline of bench_startup.py) are
+# routed through the same adapter. The payloads
+# are deterministic and scale with `scale` (1 = roughly the size of the real files):
+#   - BIS CBPOL ZIP: 10 * scale central banks of daily rates since 1990 (adapter.bis_extra_days
+#     publishes that many more days, to time the incremental history merge)
+#   - ONS generator CSVs: annual, quarterly and monthly periods going back 50 * scale years (from 1700 at most)
+#   - World Bank JSON: whatever countries and years are requested, paginated like the real API
+
+import hashlib
+import io
+import json
+import re
+import zipfile
+import zlib
+from functools import lru_cache
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import BaseAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+
+BIS_HOST = "https://data.bis.org/"
+ONS_HOST = "https://www.ons.gov.uk/"
+WORLD_BANK_HOST = "https://api.worldbank.org/"
+
+# Real areas first so the latest-rate circles have data, then synthetic ones
+BIS_AREAS = [("GB", "United Kingdom"), ("US", "United States"), ("JP", "Japan"), ("XE", "Euro area"),
+             ("CA", "Canada"), ("CH", "Switzerland"), ("SE", "Sweden"), ("AU", "Australia"),
+             ("NZ", "New Zealand"), ("NO", "Norway")]
+
+WORLD_BANK_NAMES = {"BE": "Belgium", "CA": "Canada", "FR": "France", "DE": "Germany", "IT": "Italy",
+                    "JP": "Japan", "NL": "Netherlands", "SE": "Sweden", "CH": "Switzerland",
+                    "GB": "United Kingdom", "US": "United States"}
+
+MONTHS = ["JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"]
+
+
+def bis_areas(scale):
+    areas = list(BIS_AREAS)
+    for i in range(len(BIS_AREAS), int(10 * scale)):
+        code = chr(65 + (i // 26) % 26) + chr(65 + i % 26)
+        areas.append((code, f"Synthetic Area {i:04d}"))
+    return areas[:max(int(10 * scale), 1)]
+
+
+# Days the BIS file can be extended by past BIS_LAST_DATE
+BIS_LAST_DATE = "2025-06-30"
+BIS_MAX_EXTRA_DAYS = 366
+
+
+# Step-function policy rates: each area changes rate by +/-0.25 on roughly one day in sixty.
+# extra_days adds later observations; earlier ones stay the same whatever extra_days is.
+@lru_cache(maxsize=4)
+def bis_zip(scale=1, extra_days=0):
+    rng = np.random.default_rng(0)
+    end = pd.Timestamp(BIS_LAST_DATE) + pd.Timedelta(days=BIS_MAX_EXTRA_DAYS)
+    all_dates = pd.date_range("1990-01-01", end, freq="D").strftime("%Y-%m-%d").to_numpy()
+    keep = len(all_dates) - BIS_MAX_EXTRA_DAYS + min(extra_days, BIS_MAX_EXTRA_DAYS)
+    dates = all_dates[:keep]
+    frames = []
+    for code, name in bis_areas(scale):
+        steps = np.where(rng.random(len(all_dates)) < 1 / 60, rng.choice([-0.25, 0.25], len(all_dates)), 0.0)
+        rates = np.clip(5 + np.cumsum(steps), 0, 15).round(2)[:keep]
+        frames.append(pd.DataFrame({
+            "FREQ:Frequency": "D: Daily",
+            "REF_AREA:Reference area": f"{code}: {name}",
+            "TIME_PERIOD:Time period or range": dates,
+            "OBS_VALUE:Observation Value": rates,
+            "UNIT_MEASURE:Unit of measure": "368: Per cent per year",
+            "TITLE_TS:Title": f"Central bank policy rates - {name}"
+        }))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("WS_CBPOL_csv_flat.csv", pd.concat(frames).to_csv(index=False))
+    return buffer.getvalue()
+
+
+# ONS generator CSV: 8 metadata rows then annual ("1992"), quarterly ("1992 Q2") and monthly ("1992 MAR") periods
+@lru_cache(maxsize=16)
+def ons_timeseries_csv(title, scale=1):
+    rng = np.random.default_rng(zlib.crc32(title.encode("utf-8")))
+    first_year = max(2025 - int(50 * scale), 1700)
+    lines = [f'"Title","{title}"', '"CDID","XXXX"', '"PreUnit",""', '"Unit","%"',
+             '"Release date","01-01-2025"', '"Next release","01-02-2025"',
+             '"Important notes",""', '"Source dataset ID","LMS"']
+    years = range(first_year, 2025)
+    lines += [f'"{y}","{rng.uniform(3, 8):.1f}"' for y in years]
+    lines += [f'"{y} Q{q}","{rng.uniform(3, 8):.1f}"' for y in years for q in range(1, 5)]
+    lines += [f'"{y} {m}","{rng.uniform(3, 8):.1f}"' for y in years for m in MONTHS]
+    return "\n".join(lines).encode("utf-8")
+
+
+# ONS bulletin chart CSV (AWE): 8 metadata rows then "Feb 2000" style months with several columns
+@lru_cache(maxsize=4)
+def ons_awe_csv(scale=1):
+    first_year = max(2025 - int(25 * scale), 1700)
+    months = pd.date_range(f"{first_year}-01-01", "2025-04-01", freq="MS")
+    lines = ['"Title","Average weekly earnings"'] + [f'"Note {i}",""' for i in range(6)]
+    lines.append('"Date","Total pay","Regular pay"')
+    for i, month in enumerate(months):
+        lines.append(f'"{month.strftime("%b %Y")}","{300 + i * 0.5:.1f}","{280 + i * 0.45:.1f}"')
+    return "\n".join(lines).encode("utf-8")
+
+
+# World Bank v2 indicator JSON for "BE;CA;..." country lists, paginated with per_page/page
+def world_bank_json(codes, date_range, per_page, page):
+    start, end = (int(y) for y in date_range.split(":"))
+    records = []
+    for code in codes:
+        name = WORLD_BANK_NAMES.get(code, f"Synthetic {code}")
+        base = 5e11 + (sum(map(ord, code)) % 40) * 1e11
+        for year in range(end, start - 1, -1):
+            records.append({
+                "indicator": {"id": "NY.GDP.MKTP.CD", "value": "GDP (current US$)"},
+                "country": {"id": code, "value": name},
+                "countryiso3code": code,
+                "date": str(year),
+                "value": base * (1.03 ** (year - 2000)),
+                "unit": "", "obs_status": "", "decimal": 0
+            })
+    pages = max((len(records) + per_page - 1) // per_page, 1)
+    meta = {"page": page, "pages": pages, "per_page": per_page, "total": len(records)}
+    return json.dumps([meta, records[(page - 1) * per_page:page * per_page]]).encode("utf-8")
+
+
+# requests transport adapter that answers from the synthetic payloads (with ETags, so 304s work too)
+class LocalSourceAdapter(BaseAdapter):
+    def __init__(self, scale=1):
+        super().__init__()
+        self.scale = scale
+        self.bis_extra_days = 0
+        self.requests = 0
+
+    def payload(self, url):
+        parsed = urlparse(url)
+        query = parse_qs(parsed.query)
+        if parsed.netloc == "data.bis.org":
+            return bis_zip(self.scale, self.bis_extra_days), "application/zip"
+        if parsed.netloc == "www.ons.gov.uk":
+            uri = query.get("uri", [""])[0]
+            if "/bulletins/" in uri:
+                return ons_awe_csv(self.scale), "text/csv"
+            return ons_timeseries_csv(uri.rstrip("/").split("/")[-2].upper(), self.scale), "text/csv"
+        if parsed.netloc == "api.worldbank.org":
+            codes = re.search(r"/country/([^/]+)/", parsed.path).group(1).split(";")
+            body = world_bank_json(codes, query.get("date", ["2000:2024"])[0],
+                                   int(query.get("per_page", ["50"])[0]), int(query.get("page", ["1"])[0]))
+            return body, "application/json"
+        return None, None
+
+    def send(self, request, **kwargs):
+        self.requests += 1
+        body, content_type = self.payload(request.url)
+        response = Response()
+        response.request = request
+        response.url = request.url
+        response.headers = CaseInsensitiveDict()
+        if body is None:
+            response.status_code = 404
+            body = b""
+        else:
+            etag = '"' + hashlib.md5(body).hexdigest() + '"'
+            response.headers["ETag"] = etag
+            response.headers["Content-Type"] = content_type
+            if request.headers.get("If-None-Match") == etag:
+                response.status_code = 304
+                body = b""
+            else:
+                response.status_code = 200
+        response.headers["Content-Length"] = str(len(body))
+        response.raw = io.BytesIO(body)
+        return response
+
+    def close(self):
+        pass
+
+
+# Route the three upstream hosts through the local stand-in
+def install(scale=1):
+    adapter = LocalSourceAdapter(scale)
+    hosts = (BIS_HOST, ONS_HOST, WORLD_BANK_HOST)
+
+    session = requests.Session()
+    for host in hosts:
+        session.mount(host, adapter)
+    requests.get = session.get
+
+    # Older checkouts have no shared session to mount on
+    try:
+        import DataFetch
+    except ImportError:
+        return adapter
+    for host in hosts:
+        DataFetch.mount_transport(host, adapter)
+    return adapter
@@ -0,0 +1,200 @@
+# Benchmark suite for the data loaders and chart callbacks, run fully offline against the
+# synthetic sources in local_sources.py.
+#
+# Usage (from the landing-page folder):
+#   python benchmarks/run_benchmarks.py                          # scale 1, results saved to benchmarks/results/
+#   python benchmarks/run_benchmarks.py --scale 1 10 100         # larger synthetic payloads
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/<baseline>.json
+#
+# Each result file records the median and minimum time of every benchmark; --compare flags any
+# benchmark whose median got slower than the threshold.
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LANDING_PAGE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LANDING_PAGE)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the HTTP cache and BIS history out of the user's cache folder and stop Welcome starting background threads
+BENCH_DIR = tempfile.mkdtemp(prefix="dashboard-bench-")
+os.environ.setdefault("DASHBOARD_CACHE_DIR", os.path.join(BENCH_DIR, "http"))
+os.environ.setdefault("DASHBOARD_BIS_HISTORY_DIR", os.path.join(BENCH_DIR, "bis_history"))
+os.environ.setdefault("DASHBOARD_PROCESSED_DIR", os.path.join(BENCH_DIR, "processed"))
+os.environ.setdefault("DASHBOARD_LOCK_DIR", os.path.join(BENCH_DIR, "locks"))
+# Always revalidate, so repeated fetches measure the 304 path
+os.environ["DASHBOARD_HTTP_FRESH_SECONDS"] = "0"
+os.environ["DASHBOARD_WARMUP"] = "0"
+
+import DataFetch  # noqa: E402
+import local_sources  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+# Time fn `repeat` times (setup runs before each call and is not timed)
+def timeit(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times), "repeat": repeat}
+
+
+# Forget loaded datasets (and the figures built from them) so the next scale starts from scratch
+def reset_datasets():
+    import DataRegistry
+    from FigureCache import figure_cache
+    for name in DataRegistry.registered_datasets():
+        dataset = DataRegistry._datasets[name]
+        dataset.value = None
+        dataset.version = 0
+    figure_cache.clear()
+
+
+def benchmarks(adapter):
+    import IRDataLoad
+    import GDPDataLoader
+    import EmpRatesLoad
+    import InterestRates
+    import GDP
+    import Welcome
+    from DataRegistry import get_dataset
+    from FigureCache import figure_cache
+
+    import BISHistory
+    import WarmStart
+
+    # Cold: nothing cached and no stored history or processed frames
+    def cold():
+        DataFetch.clear_cache()
+        shutil.rmtree(BISHistory.HISTORY_DIR, ignore_errors=True)
+        shutil.rmtree(WarmStart.PROCESSED_DIR, ignore_errors=True)
+
+    canonical = IRDataLoad.load_policy_rates()
+    gdp_timeseries = GDPDataLoader.get_g10_gdp_timeseries(2000, 2024)
+    bis_path = DataFetch.fetch(IRDataLoad.BIS_POLICY_RATES_URL).path
+
+    yield "IRDataLoad.load_policy_rates (cold)", IRDataLoad.load_policy_rates, cold
+    yield "IRDataLoad.load_policy_rates (304, stored history)", IRDataLoad.load_policy_rates, None
+    # The loader without its single-flight wrapper
+    load_policy_rates = inspect.unwrap(IRDataLoad.load_policy_rates)
+    yield "IRDataLoad.load_policy_rates (full rebuild)", lambda: load_policy_rates(incremental=False), None
+
+    # BIS publishes a few more days: merge them into the stored history vs. clean the whole file
+    def publish_new_days():
+        adapter.bis_extra_days = 0
+        IRDataLoad.load_policy_rates()
+        adapter.bis_extra_days = 5
+        local_sources.bis_zip(adapter.scale, adapter.bis_extra_days)  # build the payload outside the timing
+    yield "IRDataLoad.load_policy_rates (new days, incremental merge)", IRDataLoad.load_policy_rates, publish_new_days
+    yield "IRDataLoad.load_policy_rates (new days, full rebuild)", lambda: load_policy_rates(incremental=False), publish_new_days
+    adapter.bis_extra_days = 0
+    IRDataLoad.load_policy_rates()
+
+    yield "IRDataLoad.read_policy_rates_zip", lambda: IRDataLoad.read_policy_rates_zip(bis_path), None
+    yield "IRDataLoad.get_latest_rates", lambda: IRDataLoad.get_latest_rates(canonical), None
+    yield "IRDataLoad.get_full_timeseries", lambda: IRDataLoad.get_full_timeseries(canonical=canonical), None
+    yield "GDPDataLoader.get_g10_gdp_timeseries (cold)", lambda: GDPDataLoader.get_g10_gdp_timeseries(2000, 2024), cold
+    yield "GDPDataLoader.get_g10_gdp_change (from timeseries)", lambda: GDPDataLoader.get_g10_gdp_change(2023, 2024, timeseries=gdp_timeseries), None
+    yield "EmpRatesLoad.get_latest_unemployment (cold)", EmpRatesLoad.get_latest_unemployment, cold
+    yield "EmpRatesLoad.get_latest_awe (cold)", EmpRatesLoad.get_latest_awe, cold
+    yield "EmpRatesLoad.get_ons_timeseries (4 series, cold)", lambda: EmpRatesLoad.get_ons_timeseries(list(EmpRatesLoad.ONS_SERIES)), cold
+
+    # Callbacks run with the datasets loaded and the figure cache empty (the cost of a new selection)
+    reset_datasets()
+    all_rates = sorted(get_dataset('policy_rates_index'))
+    all_gdp = sorted(get_dataset('gdp_index'))
+    all_years = list(InterestRates.year_bounds(get_dataset('policy_rates_index')))
+    default_years = [InterestRates.DEFAULT_START_YEAR, all_years[1]]
+    yield "InterestRates.update_line_chart (all countries)", lambda: InterestRates.update_line_chart(all_rates, default_years, None, None), figure_cache.clear
+    yield "InterestRates.update_line_chart (cached)", lambda: InterestRates.update_line_chart(all_rates, default_years, None, None), None
+    yield "InterestRates.update_line_chart (full history)", lambda: InterestRates.update_line_chart(all_rates, all_years, None, None), figure_cache.clear
+    yield "GDP.update_gdp_line_chart (all countries)", lambda: GDP.update_gdp_line_chart(all_gdp, None), figure_cache.clear
+    yield "GDP.update_gdp_change_table (2000 vs 2024)", lambda: GDP.update_gdp_change_table(2000, 2024), None
+    for tab in ("welcome", "interest-rates", "employment-wages", "gdp"):
+        yield f"Welcome.render_tab_content ({tab}, rebuilt)", lambda tab=tab: Welcome.render_tab_content(tab), Welcome.tab_cache.clear
+        yield f"Welcome.render_tab_content ({tab})", lambda tab=tab: Welcome.render_tab_content(tab), None
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=LANDING_PAGE,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = 0
+    print(f"\nCompared with {baseline_path} ({baseline.get('revision', '?')}):")
+    for key, current in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(key)
+        if not previous:
+            continue
+        ratio = current["median"] / previous["median"] if previous["median"] else float("inf")
+        flag = "  REGRESSION" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"  {key:<70}{previous['median'] * 1000:>10.1f}ms ->{current['median'] * 1000:>10.1f}ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard loaders and callbacks offline")
+    parser.add_argument("--scale", type=float, nargs="+", default=[1], help="Synthetic payload scale factors")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark")
+    parser.add_argument("--compare", help="Baseline result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Slowdown (fraction) reported as a regression")
+    args = parser.parse_args()
+
+    results = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "benchmarks": {},
+        "memory": {}
+    }
+
+    for scale in args.scale:
+        adapter = local_sources.install(scale)
+        DataFetch.clear_cache()
+        shutil.rmtree(os.environ["DASHBOARD_BIS_HISTORY_DIR"], ignore_errors=True)
+        shutil.rmtree(os.environ["DASHBOARD_PROCESSED_DIR"], ignore_errors=True)
+        for name, fn, setup in benchmarks(adapter):
+            key = f"{name} [scale={scale:g}]"
+            results["benchmarks"][key] = timeit(fn, args.repeat, setup)
+            print(f"{key:<70}{results['benchmarks'][key]['median'] * 1000:>10.1f}ms")
+
+        # Footprint of the datasets left loaded by the callback benchmarks, compacted vs. expanded
+        from Metrics import memory_report
+        results["memory"][f"scale={scale:g}"] = report = memory_report()
+        for row in report:
+            print(f"  {row['dataset']:<30}{row['rows']:>10} rows{row['expanded_bytes'] / 1e6:>10.2f}MB ->"
+                  f"{row['bytes'] / 1e6:>8.2f}MB")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{results['revision'] or 'local'}.json")
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSaved results to {path}")
+
+    if args.compare:
+        sys.exit(1 if compare(results, args.compare, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+# The dashboard modules are imported from the landing-page folder
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
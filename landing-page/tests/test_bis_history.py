@@ -0,0 +1,65 @@
+import os
+import pandas as pd
+import pytest
+import BISHistory
+from IRDataLoad import clean_policy_rates
+
+
+@pytest.fixture(autouse=True)
+def history_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(BISHistory, "HISTORY_BASE", os.path.join(tmp_path, "policy_rates"))
+    monkeypatch.setattr(BISHistory, "META_PATH", os.path.join(tmp_path, "policy_rates.json"))
+
+
+# Raw rows as read_policy_rates_zip returns them: {label: [(date, rate), ...]}
+def raw_rows(series):
+    rows = [(label, date, rate) for label, observations in series.items() for date, rate in observations]
+    df = pd.DataFrame(rows, columns=["Country", "Date", "Interest Rate"])
+    return df.astype({"Country": "category", "Date": "string", "Interest Rate": "float64"})
+
+
+def update(series, fingerprint):
+    return BISHistory.update_history(raw_rows(series), clean_policy_rates, fingerprint)
+
+
+# The stored history should always match cleaning the whole file from scratch
+def assert_same_as_rebuild(history, series):
+    expected = clean_policy_rates(raw_rows(series))
+    pd.testing.assert_frame_equal(history.astype({"Code": str, "Country": str}),
+                                  expected.astype({"Code": str, "Country": str}))
+    assert list(history["Country"].cat.categories) == list(expected["Country"].cat.categories)
+
+
+GB = [("2024-01-01", 5.25), ("2024-01-02", 5.25)]
+US = [("2024-01-01", 5.5), ("2024-01-02", 5.5)]
+
+
+def test_new_rows_are_appended():
+    update({"GB: United Kingdom": GB, "US: United States": US}, "v1")
+    series = {"GB: United Kingdom": GB + [("2024-01-03", 5.0)], "US: United States": US,
+              "JP: Japan": [("2024-01-02", 0.1)]}
+    history = update(series, "v2")
+    assert_same_as_rebuild(history, series)
+    assert BISHistory.load_if_unchanged("v2") is not None
+    assert BISHistory.load_if_unchanged("v1") is None
+
+
+def test_revised_series_is_rebuilt():
+    update({"GB: United Kingdom": GB, "US: United States": US}, "v1")
+    series = {"GB: United Kingdom": [("2024-01-01", 5.0)] + GB[1:] + [("2024-01-03", 5.0)],
+              "US: United States": US}
+    history = update(series, "v2")
+    assert_same_as_rebuild(history, series)
+    assert history.loc[history["Country"] == "United Kingdom", "Interest Rate"].tolist() == [5.0, 5.25, 5.0]
+
+
+def test_dropped_series_is_removed():
+    update({"GB: United Kingdom": GB, "US: United States": US}, "v1")
+    series = {"US: United States": US + [("2024-01-03", 5.25)]}
+    history = update(series, "v2")
+    assert_same_as_rebuild(history, series)
+    assert list(history["Code"].cat.categories) == ["US"]
+
+    # A later update only sees the remaining series
+    series = {"US: United States": US + [("2024-01-03", 5.25), ("2024-01-04", 5.0)]}
+    assert_same_as_rebuild(update(series, "v3"), series)
@@ -0,0 +1,35 @@
+import numpy as np
+from Downsample import step_points, lttb, downsample
+
+
+def test_step_points_keeps_both_sides_of_every_change():
+    y = np.array([1, 1, 1, 2, 2, 2, 2, 3])
+    assert step_points(y).tolist() == [0, 2, 3, 6, 7]
+
+
+def test_step_points_short_series():
+    assert step_points(np.array([5.0, 6.0])).tolist() == [0, 1]
+
+
+def test_lttb_keeps_ends_and_peak():
+    x = np.arange(100)
+    y = np.zeros(100)
+    y[42] = 10
+    keep = lttb(x, y, 10)
+    assert len(keep) == 10
+    assert keep[0] == 0 and keep[-1] == 99
+    assert 42 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_threshold_at_least_length_keeps_everything():
+    x = np.arange(5)
+    assert lttb(x, x * 2.0, 5).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_downsample_step_series_is_exact():
+    x = np.arange(10000)
+    y = np.repeat([1.0, 2.0, 1.5], [3000, 4000, 3000])
+    xs, ys = downsample(x, y, max_points=100)
+    assert xs.tolist() == [0, 2999, 3000, 6999, 7000, 9999]
+    assert ys.tolist() == [1.0, 1.0, 2.0, 2.0, 1.5, 1.5]
@@ -0,0 +1,26 @@
+from FigureCache import FigureCache
+
+
+def figure(n):
+    return {'data': [{'type': 'scatter', 'x': list(range(n)), 'y': list(range(n))}], 'layout': {}}
+
+
+def test_hit_returns_the_stored_figure():
+    cache = FigureCache()
+    built = figure(10)
+    key = cache.make_key('chart', 1, ['B', 'A'])
+    assert cache.get_or_build(key, lambda: built) is built
+    assert cache.get(cache.make_key('chart', 1, ['A', 'B'])) is built
+    assert cache.stats()['hits'] == 1
+
+
+def test_evicts_least_recently_used_within_budget():
+    size = len(FigureCache.dumps(figure(100)))
+    cache = FigureCache(max_bytes=2 * size)
+    for name in ('a', 'b'):
+        cache.put((name,), figure(100))
+    cache.get(('a',))
+    cache.put(('c',), figure(100))
+    assert cache.get(('b',)) is None
+    assert cache.get(('a',)) is not None and cache.get(('c',)) is not None
+    assert cache.stats()['bytes'] <= cache.max_bytes
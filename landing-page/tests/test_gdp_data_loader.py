@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+from GDPDataLoader import gdp_change_from_matrix
+
+
+def test_gdp_change_from_matrix():
+    matrix = pd.DataFrame({2000: [1e12, 2e12, np.nan], 2024: [3e12, 2.5e12, 4e12]},
+                          index=pd.Index(["France", "Japan", "Italy"], name="Country"))
+    table = gdp_change_from_matrix(matrix, 2000, 2024)
+
+    # Italy has no 2000 value, the rest are sorted by the size of the change
+    assert table.index.tolist() == ["France", "Japan"]
+    assert table.loc["France"].tolist() == [1.0, 3.0, 2.0, 200.0]
+    assert table.loc["Japan"].tolist() == [2.0, 2.5, 0.5, 25.0]
+
+
+def test_gdp_change_from_matrix_missing_year():
+    matrix = pd.DataFrame({2000: [1e12]}, index=pd.Index(["France"], name="Country"))
+    assert gdp_change_from_matrix(matrix, 2000, 2024).empty
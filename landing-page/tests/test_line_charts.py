@@ -0,0 +1,20 @@
+from LineCharts import patch_traces
+
+
+def operations(patched):
+    return [(op["operation"], op["location"], op["params"]) for op in patched.to_plotly_json()["operations"]]
+
+
+def test_patch_traces_deletes_removed_and_appends_added():
+    patched, order = patch_traces(["A", "B", "C"], ["C", "D", "A"], lambda country: {"name": country})
+    assert order == ["A", "C", "D"]
+    assert operations(patched) == [
+        ("Delete", ["data", 1], {}),
+        ("Append", ["data"], {"value": {"name": "D"}}),
+    ]
+
+
+def test_patch_traces_deletes_from_the_end():
+    patched, order = patch_traces(["A", "B", "C"], [], lambda country: {"name": country})
+    assert order == []
+    assert [location for _, location, _ in operations(patched)] == [["data", 2], ["data", 1], ["data", 0]]
@@ -0,0 +1,15 @@
+import pandas as pd
+from ONSPeriods import parse_ons_periods
+
+
+def test_parses_each_frequency():
+    parsed = parse_ons_periods(["1992", "1992 Q2", "1992 MAR", " feb 2000 "])
+    assert parsed["Frequency"].tolist() == ["A", "Q", "M", "M"]
+    assert parsed["Date"].tolist() == [pd.Timestamp("1992-01-01"), pd.Timestamp("1992-04-01"),
+                                       pd.Timestamp("1992-03-01"), pd.Timestamp("2000-02-01")]
+
+
+def test_non_periods_are_missing():
+    parsed = parse_ons_periods(["Title", "1992 XYZ", "", None])
+    assert parsed["Frequency"].isna().all()
+    assert parsed["Date"].isna().all()